@@ -0,0 +1,257 @@
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from gameplay.engine.game import UnoGame
+
+try:
+    import fcntl
+except ImportError:  # no file locking on Windows; appends are then only safe within one process
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:  # group_by falls back to a row by row scan
+    np = None
+
+logger = logging.getLogger("gameplay.analytics")
+
+STRATEGIES = ["human", "basic"]
+
+
+def _rule_column(name: str) -> str:
+    return "rule_" + re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+# One row per seat of every finished game; each column is a file holding a
+# packed array of this type code.
+COLUMNS: Dict[str, str] = {
+    "game": "I",
+    "seat": "B",
+    "rank": "B",
+    "is_ai": "B",
+    "strategy": "B",
+    "players": "B",
+    "duration": "f",
+    "drawn": "I",
+    "finished_at": "d",
+}
+COLUMNS.update({_rule_column(rule.name): "H" for rule in UnoGame.generate_rules()})
+
+# Computed from stored columns when queried: one function for a single row
+# and one for whole NumPy columns.
+DERIVED: Dict[str, Tuple[Callable[[Dict[str, memoryview], int], float], Callable]] = {
+    "won": (lambda cols, i: 1.0 if cols["rank"][i] == 1 else 0.0,
+            lambda cols: cols["rank"] == 1),
+}
+
+# Each aggregate reads a running [count, sum, min, max] accumulator.
+AGGREGATES = {
+    "count": lambda acc: float(acc[0]),
+    "sum": lambda acc: float(acc[1]),
+    "mean": lambda acc: acc[1] / acc[0] if acc[0] else 0.0,
+    "min": lambda acc: float(acc[2]),
+    "max": lambda acc: float(acc[3]),
+}
+
+
+def strategy_of(player) -> str:
+    return "basic" if player.is_ai else "human"
+
+
+def game_rows(game: UnoGame, game_number: int, now: float = None) -> List[Dict[str, float]]:
+    """Column values for each seat of a finished game."""
+    now = time.time() if now is None else now
+    finished_at = game.time_finished or now
+    ranks = {player.id: rank for rank, player in enumerate(game.finished, start=1)}
+    rules = {_rule_column(rule.name): rule.value for rule in game.rules}
+    rows = []
+    for player in game.players.values():
+        row = {
+            "game": game_number,
+            "seat": player.id,
+            "rank": ranks.get(player.id, 0),
+            "is_ai": int(player.is_ai),
+            "strategy": STRATEGIES.index(strategy_of(player)),
+            "players": len(game.players),
+            "duration": finished_at - game.time_started,
+            "drawn": game.drawn,
+            "finished_at": finished_at,
+        }
+        row.update(rules)
+        rows.append(row)
+    return rows
+
+
+class GameStore:
+    """Append-only columnar store of finished games.
+
+    Appends write each column to its own file; reads memory-map the files and
+    aggregate straight from the mapped buffers, so scanning millions of rows
+    never builds per-game objects. Appends hold an exclusive lock on the
+    store's lock file, so several server processes can share a store, and a
+    row left half written by a crash is cut off before the next append.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.RLock()
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            schema_file = os.path.join(self.path, "schema.json")
+            if not os.path.exists(schema_file):
+                with open(schema_file, "w") as f:
+                    json.dump(COLUMNS, f)
+            with open(schema_file) as f:
+                self.schema: Dict[str, str] = json.load(f)
+            self._repair()
+
+    def _file(self, column: str) -> str:
+        return os.path.join(self.path, f"{column}.bin")
+
+    @contextmanager
+    def _locked(self):
+        """Hold the store against other threads and, where supported, other processes."""
+        with self.lock, open(os.path.join(self.path, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _lengths(self) -> Dict[str, int]:
+        lengths = {}
+        for column, code in self.schema.items():
+            try:
+                size = os.path.getsize(self._file(column))
+            except FileNotFoundError:
+                size = 0
+            lengths[column] = size // array(code).itemsize
+        return lengths
+
+    def _repair(self):
+        """Cut every column back to the rows all columns have (call holding the lock)."""
+        lengths = self._lengths()
+        rows = min(lengths.values(), default=0)
+        for column, length in lengths.items():
+            if length != rows:
+                logger.warning("Analytics column %s has %d rows, expected %d; truncating", column, length, rows)
+                with open(self._file(column), "r+b") as f:
+                    f.truncate(rows * array(self.schema[column]).itemsize)
+
+    def __len__(self) -> int:
+        return min(self._lengths().values(), default=0)
+
+    def games(self) -> int:
+        rows = len(self)
+        return int(self.column("game")[rows - 1]) + 1 if rows else 0
+
+    def _append_rows(self, rows: Sequence[Dict[str, float]]):
+        self._repair()
+        for column, code in self.schema.items():
+            values = array(code, [row.get(column, 0) for row in rows])
+            with open(self._file(column), "ab") as f:
+                f.write(values.tobytes())
+
+    def append_rows(self, rows: Sequence[Dict[str, float]]):
+        with self._locked():
+            self._append_rows(rows)
+
+    def append_game(self, game: UnoGame):
+        # The game number is read and used under the same lock, so two
+        # processes never hand out the same one.
+        with self._locked():
+            self._repair()
+            self._append_rows(game_rows(game, self.games()))
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of a stored column."""
+        path = self._file(name)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return memoryview(array(self.schema[name]))
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(self.schema[name])
+
+    def group_by(self, keys: Iterable[str], value: str = "won", agg: str = "mean",
+                 where: Optional[Dict[str, float]] = None) -> Dict[Tuple, float]:
+        """Aggregate `value` over rows grouped by the `keys` columns.
+
+        `value` may be a stored column or a derived one such as "won";
+        `where` keeps only rows whose columns equal the given values.
+        """
+        keys = list(keys)
+        where = where or {}
+        rows = len(self)
+        needed = set(keys) | set(where) | {"rank"}
+        if value not in DERIVED:
+            needed.add(value)
+        cols = {name: self.column(name) for name in needed}
+
+        if agg not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate '{agg}'")
+        if np is not None:
+            return self._group_by_arrays(keys, value, agg, where, cols, rows)
+        groups: Dict[Tuple, List[float]] = {}
+        get_value = DERIVED[value][0] if value in DERIVED else None
+        for i in range(rows):
+            if any(cols[name][i] != expected for name, expected in where.items()):
+                continue
+            key = tuple(cols[name][i] for name in keys)
+            val = get_value(cols, i) if get_value else cols[value][i]
+            acc = groups.get(key)
+            if acc is None:
+                groups[key] = [1, val, val, val]
+            else:
+                acc[0] += 1
+                acc[1] += val
+                if val < acc[2]:
+                    acc[2] = val
+                if val > acc[3]:
+                    acc[3] = val
+        return {key: AGGREGATES[agg](acc) for key, acc in sorted(groups.items())}
+
+    @staticmethod
+    def _group_by_arrays(keys, value, agg, where, cols, rows) -> Dict[Tuple, float]:
+        """group_by() in whole-column NumPy operations."""
+        arrays = {name: np.asarray(col)[:rows] for name, col in cols.items()}
+        if where:
+            selected = np.ones(rows, dtype=bool)
+            for name, expected in where.items():
+                selected &= arrays[name] == expected
+            arrays = {name: column[selected] for name, column in arrays.items()}
+        values = (DERIVED[value][1](arrays) if value in DERIVED else arrays[value]).astype(np.float64)
+        if not len(values):
+            return {}
+        if keys:
+            # Number each key column's distinct values, then each distinct
+            # combination; both come out sorted, as the keys are ordered.
+            uniques, codes = zip(*(np.unique(arrays[name], return_inverse=True) for name in keys))
+            shape = tuple(len(unique) for unique in uniques)
+            combined = np.ravel_multi_index([code.reshape(-1) for code in codes], shape)
+            ids, inverse = np.unique(combined, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            positions = np.unravel_index(ids, shape)
+            groups = list(zip(*(unique[position].tolist() for unique, position in zip(uniques, positions))))
+        else:
+            groups, inverse = [()], np.zeros(len(values), dtype=np.intp)
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = np.bincount(inverse, weights=values, minlength=len(groups))
+        mins = np.full(len(groups), np.inf)
+        np.minimum.at(mins, inverse, values)
+        maxs = np.full(len(groups), -np.inf)
+        np.maximum.at(maxs, inverse, values)
+        return {key: AGGREGATES[agg]((int(counts[i]), float(sums[i]), float(mins[i]), float(maxs[i])))
+                for i, key in enumerate(groups)}
+
+    def win_rate(self, by: Iterable[str] = ("seat",), where: Optional[Dict[str, float]] = None) -> Dict[Tuple, float]:
+        return self.group_by(by, "won", "mean", where)
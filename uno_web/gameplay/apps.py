@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class GameplayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gameplay'
+
+    def ready(self):
+        from django.conf import settings
+
+        from gameplay.engine.game import UnoGame
+        from gameplay.engine.trace import JsonLinesSink, tracer
+        from gameplay.reaper import game_reaper
+        from gameplay.turns import turn_scheduler
+        from gameplay.views import expire_session_turn, reap_session_game
+
+        UnoGame.turn_timers = turn_scheduler
+        turn_scheduler.on_expire = expire_session_turn
+        game_reaper.idle = getattr(settings, "UNO_GAME_IDLE_TIMEOUT", 0)
+        game_reaper.batch = getattr(settings, "UNO_REAPER_BATCH", 50)
+        game_reaper.on_evict = reap_session_game
+
+        trace_file = getattr(settings, "UNO_TRACE_FILE", None)
+        if trace_file:
+            tracer.configure(getattr(settings, "UNO_TRACE_SAMPLE_RATE", 1.0), [JsonLinesSink(trace_file)])
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, List
+
+
+class StaleGameError(Exception):
+    """Raised when a game is saved over a version it was not loaded from."""
+
+
+class GameLocks:
+    """One lock per game id, so actions on a game are serialized while
+    different games proceed in parallel. Entries are dropped once nobody
+    holds or waits for them."""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, List] = {}
+
+    def _checkout(self, game_id: str) -> threading.Lock:
+        with self._guard:
+            entry = self._locks.get(game_id)
+            if entry is None:
+                entry = self._locks[game_id] = [threading.Lock(), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _checkin(self, game_id: str):
+        with self._guard:
+            entry = self._locks[game_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[game_id]
+
+    @contextmanager
+    def hold(self, game_id: str):
+        lock = self._checkout(game_id)
+        try:
+            with lock:
+                yield
+        finally:
+            self._checkin(game_id)
+
+    @asynccontextmanager
+    async def ahold(self, game_id: str, poll: float = 0.005):
+        """Async variant of hold() for async views, sharing its locks.
+
+        It polls the lock every `poll` seconds instead of blocking the event
+        loop, so a cancelled wait never leaves the lock taken.
+        """
+        lock = self._checkout(game_id)
+        try:
+            while not lock.acquire(blocking=False):
+                await asyncio.sleep(poll)
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._checkin(game_id)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+game_locks = GameLocks()
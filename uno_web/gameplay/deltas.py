@@ -0,0 +1,95 @@
+from collections import Counter
+from typing import Dict, List, Optional
+
+from gameplay.engine.game import UnoGame
+
+# Number of versions served to clients kept per game to diff against; clients
+# further behind than this get a full state instead.
+MAX_HISTORY = 16
+
+
+def card_key(card) -> Optional[List]:
+    if card is None:
+        return None
+    return [card.get_code(), card.color]
+
+
+def game_state(game: UnoGame) -> Dict:
+    """Compact, JSON-friendly state of one version, including every hand as
+    card type counts so any seat's hand can be diffed later."""
+    snapshot = game.snapshot()
+    return {
+        "version": snapshot.version,
+        "turn": snapshot.current.id if snapshot.current else None,
+        "top": card_key(snapshot.top_card),
+        "deck": snapshot.deck_count,
+        # Finished players stay in at 0, so deltas can show them leaving.
+        "counts": {**{p.id: 0 for p in snapshot.finished}, **{p.id: p.card_count for p in snapshot.players}},
+        "finished": [p.id for p in snapshot.finished],
+        "hands": {p.id: dict(Counter(card.get_code() for card in p.hand)) for p in snapshot.players},
+    }
+
+
+def remember(history: List[Dict], state: Dict) -> List[Dict]:
+    """Add a state to a game's history of served versions, oldest first."""
+    history = [old for old in history if old["version"] != state["version"]] + [state]
+    history.sort(key=lambda old: old["version"])
+    return history[-MAX_HISTORY:]
+
+
+def find(history: List[Dict], version: int) -> Optional[Dict]:
+    return next((state for state in history if state["version"] == version), None)
+
+
+def full_state(state: Dict, viewer: Optional[int]) -> Dict:
+    return {
+        "full": True,
+        "version": state["version"],
+        "turn": state["turn"],
+        "top": state["top"],
+        "deck": state["deck"],
+        "counts": state["counts"],
+        "finished": state["finished"],
+        "viewer": viewer,
+        "hand": state["hands"].get(viewer) if viewer is not None else None,
+    }
+
+
+def diff(old: Dict, new: Dict, viewer: Optional[int], client_viewer: Optional[int]) -> Dict:
+    """Changes from `old` to `new` as seen by `viewer`, whose hand is shown.
+
+    If the client was showing a different hand (or none), the viewer's whole
+    hand is sent; otherwise only the cards added to and removed from it.
+    """
+    delta = {"version": new["version"], "base": old["version"]}
+    for key in ("turn", "top", "deck", "finished"):
+        if old[key] != new[key]:
+            delta[key] = new[key]
+
+    counts = {pid: n for pid, n in new["counts"].items() if old["counts"].get(pid) != n}
+    if counts:
+        delta["counts"] = counts
+
+    if viewer != client_viewer:
+        delta["viewer"] = viewer
+        delta["hand"] = new["hands"].get(viewer) if viewer is not None else None
+    elif viewer is not None:
+        before = old["hands"].get(viewer, {})
+        after = new["hands"].get(viewer, {})
+        added = {code: n - before.get(code, 0) for code, n in after.items() if n > before.get(code, 0)}
+        removed = {code: n - after.get(code, 0) for code, n in before.items() if n > after.get(code, 0)}
+        if added:
+            delta["added"] = added
+        if removed:
+            delta["removed"] = removed
+    return delta
+
+
+def update_for(history: List[Dict], current: Dict, since: Optional[int],
+               viewer: Optional[int], client_viewer: Optional[int]) -> Dict:
+    """Delta from the client's acknowledged version, or the full state when
+    that version is unknown or too far behind."""
+    base = find(history, since) if since is not None else None
+    if base is None:
+        return full_state(current, viewer)
+    return diff(base, current, viewer, client_viewer)
@@ -1,15 +1,31 @@
 from  gameplay.engine.constants import *
 
 class Card:
+    __slots__ = ("num", "id", "wild", "color")
+
     def __init__(self, card_id: str, color: str, num: int):
         self.num = num
         self.id = card_id
         self.wild = color == "wild" or color == ""
         self.color = color
     
+    @staticmethod
+    def from_code(code: int) -> "Card":
+        return CARD_PROTOTYPES[code]
+
+    def copy(self) -> "Card":
+        card = Card(self.id, "" if self.wild else self.color, self.num)
+        card.color = self.color
+        return card
+
     def get_color_name(self) -> str:
         return COLORS.get(self.color, "")
 
+    def get_code(self) -> int:
+        if self.wild or self.id in WILD_CARDS:
+            return CARD_CODES[("", self.id)]
+        return CARD_CODES[(self.color, self.id)]
+
     def get_value(self) -> int:
         val = 0
 
@@ -53,4 +69,27 @@ class Card:
     def __ge__(self, other) -> bool:
         if not isinstance(other, Card):
             return NotImplemented
-        return self.get_value() >= other.get_value()
\ No newline at end of file
+        return self.get_value() >= other.get_value()
+
+
+class SharedCard(Card):
+    """A card prototype. Every game refers to the same instance, so it cannot be changed."""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self} is a shared card; change a copy() of it instead")
+
+    def __reduce__(self):
+        return Card.from_code, (self.num,)
+
+
+def _prototype(code: int, color: str, rank: str) -> SharedCard:
+    card = Card(rank, color, code)
+    card.__class__ = SharedCard
+    return card
+
+
+# One shared instance per card face. Hands and the deck only ever refer to
+# these; a separate physical card is made when one needs its own state, such
+# as the colour chosen for a wild on the discard pile.
+CARD_PROTOTYPES = [_prototype(code, color, rank) for code, (color, rank) in enumerate(CARD_TYPES)]
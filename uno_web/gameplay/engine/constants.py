@@ -33,4 +33,15 @@ SPECIAL_CARDS = {
     "+2": 12,
     "WILD": 13,
     "WILD+4": 14
-}
\ No newline at end of file
+}
+
+CARD_RANKS = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "SKIP", "REVERSE", "+2"]
+
+WILD_CARDS = ["WILD", "WILD+4"]
+
+# Every distinct card face as (color, id); a card's type code is its index here.
+CARD_TYPES = [(color, rank) for color in COLORS for rank in CARD_RANKS] + [("", wild) for wild in WILD_CARDS]
+
+CARD_CODES = {card_type: code for code, card_type in enumerate(CARD_TYPES)}
+
+NUM_CARD_TYPES = len(CARD_TYPES)
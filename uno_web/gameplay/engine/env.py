@@ -0,0 +1,260 @@
+import random
+from typing import List, Optional, Sequence
+from  gameplay.engine import legal
+from  gameplay.engine.constants import CARD_TYPES, COLORS, NUM_CARD_TYPES, WILD_CARDS
+from  gameplay.engine.game import UnoGame, deck_template
+from  gameplay.engine.moves import Move
+from  gameplay.engine.state import RULE_INDEX
+
+try:
+    import numpy as np
+except ImportError:  # the environments need NumPy; the rest of the engine does not
+    np = None
+
+# Actions are indexes into ACTIONS: one play per coloured card type, one per
+# wild type and colour, and a draw. UNO calls and callouts are not part of
+# the action space (with nobody calling out, saying UNO changes nothing).
+ACTIONS: List[Move] = []
+for _code, (_color, _rank) in enumerate(CARD_TYPES):
+    if _rank in WILD_CARDS:
+        ACTIONS.extend(("play", _code, color) for color in legal.COLOR_ORDER)
+    else:
+        ACTIONS.append(("play", _code, None))
+DRAW_ACTION = len(ACTIONS)
+ACTIONS.append(("draw", None, None))
+NUM_ACTIONS = len(ACTIONS)
+
+MAX_PLAYERS = 10
+
+if np is not None:
+    # _COMPATIBLE[top index, code]: whether a card type can go on that top;
+    # _ACTION_CODES[action]: the card type an action plays.
+    _COMPATIBLE = np.array([[mask >> code & 1 for code in range(NUM_CARD_TYPES)] for mask in legal.COMPATIBLE],
+                           dtype=bool)
+    _ACTION_CODES = np.array([code for _, code, _ in ACTIONS[:-1]])
+
+# Observation layout, from the acting player's point of view:
+#   OBS_HAND:      count of each card type in their hand
+#   OBS_TOP:       one-hot top card (a coloured wild takes its colour's slot)
+#   OBS_OPPONENTS: card counts of the seats after theirs in the direction of
+#                  play (0 for players who finished and for unused seats)
+#   OBS_DIRECTION: 1 when turns go up the seat numbers, -1 when they go down
+#   OBS_DECK:      cards left in the deck
+OBS_HAND = slice(0, NUM_CARD_TYPES)
+OBS_TOP = slice(OBS_HAND.stop, OBS_HAND.stop + NUM_CARD_TYPES + len(legal.COLOR_ORDER))
+OBS_OPPONENTS = slice(OBS_TOP.stop, OBS_TOP.stop + MAX_PLAYERS - 1)
+OBS_DIRECTION = OBS_OPPONENTS.stop
+OBS_DECK = OBS_DIRECTION + 1
+OBS_SIZE = OBS_DECK + 1
+
+_RANKS = [rank for _, rank in CARD_TYPES]
+
+
+class _Table:
+    """One game's mutable state, playing exactly as UnoGame and GameState do.
+
+    Hands are rows of card type counts in the VectorEnv's shared array, and
+    the turn order is kept as in UnoGame: the players still in the game, in
+    turn order from the current one.
+    """
+
+    __slots__ = ("rules", "seed", "shuffles", "deck", "discard", "top", "hands", "sizes",
+                 "queue", "finished", "direction")
+
+    def __init__(self, players: int, rules: Sequence[int], seed: int, hands, sizes):
+        self.rules = rules
+        self.seed = seed
+        deck = list(deck_template(rules[RULE_INDEX["Decks"]]))
+        random.Random(f"{seed}:0").shuffle(deck)
+        self.shuffles = 1
+        first = deck.pop()
+        initial = rules[RULE_INDEX["Initial Cards"]]
+        if initial * players > len(deck):
+            raise Exception("Did not find enough cards to start playing")
+        self.deck = deck
+        self.discard = [first]
+        self.top = first
+        self.hands = hands
+        self.sizes = sizes
+        hands[:] = 0
+        sizes[:] = 0
+        self.queue = list(range(players))
+        self.finished: List[int] = []
+        self.direction = 1
+        for seat in range(players):
+            self.deal(seat, initial)
+
+    def deal(self, seat: int, number: int):
+        deck = self.deck
+        if len(deck) < number:
+            deck.extend(self.discard[:-1])
+            self.discard = self.discard[-1:]
+            random.Random(f"{self.seed}:{self.shuffles}").shuffle(deck)
+            self.shuffles += 1
+        dealt = min(number, len(deck))
+        if dealt == 1:
+            self.hands[seat, deck.pop()] += 1
+        elif dealt:
+            np.add.at(self.hands[seat], deck[-dealt:], 1)
+            del deck[-dealt:]
+        self.sizes[seat] += dealt
+
+    def play(self, code: int, color: Optional[str]) -> bool:
+        """Play a card for the current player; returns whether they finished."""
+        queue = self.queue
+        seat = queue[0]
+        self.hands[seat, code] -= 1
+        self.sizes[seat] -= 1
+        self.discard.append(code)
+        rank = _RANKS[code]
+        self.top = NUM_CARD_TYPES + legal.COLOR_ORDER.index(color) if color in COLORS else code
+
+        done = self.sizes[seat] == 0
+        if done:
+            self.finished.append(seat)
+            if len(queue) == 2:
+                self.finished.append(queue[1])
+                self.queue = []
+                return True
+
+        if rank == "REVERSE":
+            if len(queue) > 2:
+                queue.reverse()
+                queue.insert(0, queue.pop())
+                self.direction = -self.direction
+            elif self.rules[RULE_INDEX["Reverses Skip"]] == 1:
+                queue.reverse()
+        elif rank == "SKIP":
+            queue.append(queue.pop(0))
+        elif rank == "+2" or rank == "WILD+4":
+            self.deal(queue[1], 2 if rank == "+2" else 4)
+            if self.rules[RULE_INDEX["Draws Skip"]] == 1:
+                queue.append(queue.pop(0))
+        self.next()
+        return done
+
+    def draw(self):
+        self.deal(self.queue[0], 1)
+        self.next()
+
+    def next(self):
+        queue = self.queue
+        queue.append(queue.pop(0))
+        if self.finished:
+            self.queue = [seat for seat in queue if seat not in self.finished]
+
+
+class VectorEnv:
+    """Many UNO games stepped together, for training bots by self-play.
+
+    Every step is taken by the current player of each game. obs, masks,
+    rewards and dones are preallocated arrays (one row per game) that step()
+    and reset() overwrite in place and return, and the observations and
+    legal-action masks of all games are written in a few whole-array
+    operations per step rather than game by game. A finished game is reset
+    straight away with the next seed; its row then holds the new game's first
+    observation and `dones` is set. The reward is 1 to the player whose move
+    emptied their hand, else 0.
+    """
+
+    def __init__(self, num_envs: int, players: int = 4, rules: Optional[Sequence[int]] = None,
+                 seed: Optional[int] = None):
+        if np is None:
+            raise Exception("NumPy is required for the UNO environments")
+        if not 2 <= players <= MAX_PLAYERS:
+            raise Exception(f"Need between 2 and {MAX_PLAYERS} players")
+        self.num_envs = num_envs
+        self.players = players
+        self.rules = tuple(rule.value for rule in UnoGame.generate_rules()) if rules is None else tuple(rules)
+        self.must_play = self.rules[RULE_INDEX["Must Play"]] == 1
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+        self.masks = np.zeros((num_envs, NUM_ACTIONS), dtype=bool)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.seats = np.zeros(num_envs, dtype=np.intp)
+        self.hands = np.zeros((num_envs, players, NUM_CARD_TYPES), dtype=np.int16)
+        self.sizes = np.zeros((num_envs, players), dtype=np.int32)
+        self.playable = np.zeros((num_envs, NUM_CARD_TYPES), dtype=bool)
+        self.tables: List[_Table] = []
+        self._next_seed = random.getrandbits(32) if seed is None else seed
+        self._rows = np.arange(num_envs)
+        self._offsets = np.arange(1, players)
+
+    def _new_table(self, i: int) -> _Table:
+        seed = self._next_seed
+        self._next_seed = (self._next_seed + 1) & 0xFFFFFFFF
+        return _Table(self.players, self.rules, seed, self.hands[i], self.sizes[i])
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is not None:
+            self._next_seed = seed
+        self.tables = [self._new_table(i) for i in range(self.num_envs)]
+        self.rewards[:] = 0
+        self.dones[:] = False
+        self._observe()
+        return self.obs, self.masks
+
+    def step(self, actions: Sequence[int]):
+        rewards, dones, playable = self.rewards, self.dones, self.playable
+        for i, action in enumerate(actions):
+            table = self.tables[i]
+            if action == DRAW_ACTION:
+                if not self.masks[i, DRAW_ACTION]:
+                    raise ValueError(f"Game {i}: must play a card when able")
+                table.draw()
+                rewards[i] = 0
+            else:
+                kind, code, color = ACTIONS[action]
+                if not playable[i, code]:
+                    raise ValueError(f"Game {i}: action {action} is not legal")
+                rewards[i] = table.play(code, color)
+            if table.queue:
+                dones[i] = False
+            else:
+                dones[i] = True
+                self.tables[i] = self._new_table(i)
+        self._observe()
+        return self.obs, rewards, dones, self.masks
+
+    def _observe(self):
+        tables, rows, obs = self.tables, self._rows, self.obs
+        seats = self.seats
+        seats[:] = [table.queue[0] for table in tables]
+        tops = np.array([table.top for table in tables])
+        directions = np.array([table.direction for table in tables])
+
+        hands = self.hands[rows, seats]
+        obs[:, OBS_HAND] = hands
+        obs[:, OBS_TOP] = 0
+        obs[rows, OBS_TOP.start + tops] = 1
+        others = (seats[:, None] + directions[:, None] * self._offsets) % self.players
+        obs[:, OBS_OPPONENTS.start:OBS_OPPONENTS.start + self.players - 1] = self.sizes[rows[:, None], others]
+        obs[:, OBS_DIRECTION] = directions
+        obs[:, OBS_DECK] = [len(table.deck) for table in tables]
+
+        np.logical_and(hands > 0, _COMPATIBLE[tops], out=self.playable)
+        self.masks[:, :DRAW_ACTION] = self.playable[:, _ACTION_CODES]
+        if self.must_play:
+            np.logical_not(self.playable.any(axis=1), out=self.masks[:, DRAW_ACTION])
+        else:
+            self.masks[:, DRAW_ACTION] = True
+
+
+class UnoEnv:
+    """Gym-style single game: reset(seed) -> (obs, mask), step(action) -> (obs, reward, done, info).
+
+    The arrays returned are views into one VectorEnv row and are reused
+    across steps. As in VectorEnv, the observation returned with done=True
+    is already the first of the next game.
+    """
+
+    def __init__(self, players: int = 4, rules: Optional[Sequence[int]] = None):
+        self.vector = VectorEnv(1, players, rules)
+
+    def reset(self, seed: Optional[int] = None):
+        self.vector.reset(seed)
+        return self.vector.obs[0], self.vector.masks[0]
+
+    def step(self, action: int):
+        obs, rewards, dones, masks = self.vector.step((action,))
+        return obs[0], float(rewards[0]), bool(dones[0]), {"seat": int(self.vector.seats[0]), "mask": masks[0]}
@@ -1,22 +1,61 @@
 import random
 import time
-from typing import Dict, List, Optional
+import uuid
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from  gameplay.engine.card import Card
 from  gameplay.engine.player import Player
 from  gameplay.engine.rules import Rule
-from  gameplay.engine.constants import COLORS, COLOR_ALIASES, COLOR_SYMBOLS, COLOR_VALUES
+from  gameplay.engine import legal, moves
+from  gameplay.engine.snapshot import GameSnapshot, take_snapshot
+from  gameplay.engine.trace import tracer
+from  gameplay.engine.tracker import UnseenCards
+from  gameplay.engine.constants import CARD_CODES, CARD_RANKS, COLORS, COLOR_ALIASES, COLOR_SYMBOLS, COLOR_VALUES, WILD_CARDS
+
+
+def _single_deck() -> List[int]:
+    codes = []
+    for color in COLORS:
+        for rank in CARD_RANKS:
+            copies = 1 if rank == "0" else 2
+            codes.extend([CARD_CODES[(color, rank)]] * copies)
+    for wild in WILD_CARDS:
+        codes.extend([CARD_CODES[("", wild)]] * 4)
+    return codes
+
+
+SINGLE_DECK = tuple(_single_deck())
+
+
+@lru_cache(maxsize=None)
+def deck_template(decks: int) -> Tuple[int, ...]:
+    """Card type codes for an unshuffled stack of the given number of decks."""
+    return SINGLE_DECK * decks
+
 
 class UnoGame:
-    def __init__(self):
+    # Optional TimerWheel shared by all games; when set, turn deadlines are
+    # armed on it by game id as turns advance.
+    turn_timers = None
+
+    def __init__(self, seed: Optional[int] = None):
+        self.id: str = uuid.uuid4().hex
+        self.seed: int = random.getrandbits(32) if seed is None else seed
+        self.shuffles: int = 0
+        self.moves: array = array("B")
+        self.version: int = 0
         self.players: Dict[int, Player] = {}
         self.queue: List[Player] = []
-        self.deck: List[Card] = []
+        self.deck: array = array("B")
         self.called_out: bool = False
         self.discard: List[Card] = []
         self.finished: List[Player] = []
         self.drawn: int = 0
-        self.card_num: int = 1
         self.time_started: float = 0
+        self.time_finished: Optional[float] = None
+        self.turn_deadline: Optional[float] = None
+        self._snapshot: Optional[GameSnapshot] = None
         self.rules: List[Rule] = self.generate_rules()
 
 
@@ -31,6 +70,7 @@ class UnoGame:
             Rule(5, "Gives the ability to call someone out for not saying uno!.", 1, "Callouts", "boolean", 0, 0),
             Rule(6, "The number of cards to give someone when called out.", 2, "Callout Penalty", "integer", 1000, 0),
             Rule(7, "The number of cards to give someone for falsely calling someone out.", 2, "False Callout Penalty", "integer", 1000, 0),
+            Rule(8, "Seconds a player has to act before a move is made for them (0 disables).", 0, "Turn Timeout", "integer", 3600, 0),
         ]
 
     def generate_deck(self):
@@ -38,38 +78,34 @@ class UnoGame:
         if not decks_rule:
             raise Exception("Rule 'decks' not found")
         
-        decks = decks_rule.value
-        for _ in range(decks):
-            for color in COLORS:
-                for card_num in range(10):
-                    self.deck.append(Card(str(card_num), color, self.card_num))
-                    self.card_num += 1
-                    if card_num != 0: 
-                        self.deck.append(Card(str(card_num), color, self.card_num))
-                        self.card_num += 1
-                
-                for _ in range(2):
-                    self.deck.append(Card("+2", color, self.card_num))
-                    self.card_num += 1
-                    self.deck.append(Card("SKIP", color, self.card_num))
-                    self.card_num += 1
-                    self.deck.append(Card("REVERSE", color, self.card_num))
-                    self.card_num += 1
-            
-            for _ in range(4):
-                self.deck.append(Card("WILD", "", self.card_num))
-                self.card_num += 1
-                self.deck.append(Card("WILD+4", "", self.card_num))
-                self.card_num += 1
-        
+        self.deck = array("B", deck_template(decks_rule.value))
         self.shuffle_deck()
 
     def shuffle_deck(self):
-        random.shuffle(self.deck)
+        # Every shuffle is derived from the game's seed, so a game can be
+        # replayed from its seed and its moves alone.
+        random.Random(f"{self.seed}:{self.shuffles}").shuffle(self.deck)
+        self.shuffles += 1
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_snapshot"] = None
+        return state
+
+    def snapshot(self) -> GameSnapshot:
+        """Immutable view of the current version, memoized until the next change."""
+        if self._snapshot is None or self._snapshot.version != self.version:
+            self._snapshot = take_snapshot(self)
+        return self._snapshot
+
+    def touch(self):
+        """Mark the game state as changed by moving it to a new version."""
+        self.version += 1
 
     def add_player(self, name: str, is_ai: bool = False) -> Player:
         player = Player(len(self.players), name, is_ai)
         self.players[player.id] = player
+        self.touch()
         return player
 
     def start(self):
@@ -79,7 +115,12 @@ class UnoGame:
         self.generate_deck()
         self.queue = [player for player in self.players.values()]
         self.time_started = time.time()
-        self.discard.append(self.deck.pop())
+        # Every AI seat keeps track of the cards it has not seen.
+        for player in self.queue:
+            if player.is_ai:
+                player.unseen = UnseenCards(deck_template(self.get_rule("Decks").value))
+        self.discard.append(Card.from_code(self.deck.pop()).copy())
+        self._seen(self.discard[-1].get_code())
         
         start_card_rule = self.get_rule("Initial Cards")
         if not start_card_rule:
@@ -91,42 +132,59 @@ class UnoGame:
         
         for player_id in self.players.keys():
             self.deal(player_id, start_card_no)
+        
+        self.arm_turn_timer()
 
     def deal(self, player_id: int, number: int) -> str:
         if len(self.deck) < number:
             if len(self.discard) == 0:
                 raise Exception("Not enough cards found to play")
             
-            top_card = self.discard[0]
-            self.deck.extend(self.discard[1:])
+            top_card = self.discard[-1]
+            returned = [card.get_code() for card in self.discard[:-1]]
+            self.deck.extend(returned)
             self.discard = [top_card]
+            for other in self.players.values():
+                if other.unseen is not None:
+                    other.unseen.restore(returned)
             self.shuffle_deck()
+            if tracer.enabled:
+                tracer.event("reshuffle", game=self.id, cards=len(self.deck), shuffles=self.shuffles)
         
         player = self.players.get(player_id)
         if not player:
             raise Exception(f"Player with id {player_id} not found")
         
-        card_num = f"{self.deck[0].get_color_name()} {self.deck[0].id}" if self.deck else -1
+        if self.deck:
+            next_card = Card.from_code(self.deck[-1])
+            card_num = f"{next_card.get_color_name()} {next_card.id}"
+        else:
+            card_num = -1
         
         for _ in range(number):
             if self.deck:
-                player.hand.append(self.deck.pop(0))
+                code = self.deck.pop()
+                player.hand.append(Card.from_code(code))
+                if player.unseen is not None:
+                    player.unseen.see(code)
                 self.drawn += 1
+                player.drawn += 1
         
-        player.sort_hand()
+        player.cards_changed()
         player.called = False
+        self.touch()
+        if tracer.enabled:
+            tracer.event("deal", game=self.id, player=player_id, cards=number, deck=len(self.deck))
         return card_num
 
+    def _seen(self, code: int, by: Optional[Player] = None):
+        """A card reached the discard pile; every tracker but its player's sees it."""
+        for player in self.players.values():
+            if player is not by and player.unseen is not None:
+                player.unseen.see(code)
+
     def scoreboard(self) -> str:
-        lines = []
-        rank = 1
-        for person in self.finished:
-            lines.append(f"{rank}. *{person.username}*")
-            rank += 1
-        
-        mins = int((time.time() - self.time_started) / 60)
-        lines.append(f"\nThis game lasted {mins} minutes and {self.drawn} cards were drawn")
-        return "\n".join(lines)
+        return self.snapshot().scoreboard()
 
     def get_rule(self, name: str) -> Optional[Rule]:
         return next((rule for rule in self.rules if rule.name.lower() == name.lower()), None)
@@ -152,12 +210,49 @@ class UnoGame:
         if not self.queue:
             raise Exception("All players finished!")
         
+        self.arm_turn_timer()
+        self.touch()
         return self.queue[0]
 
-    def play(self, card_str: str, wild_color: str = None) -> str:       
+    def arm_turn_timer(self):
+        timeout_rule = self.get_rule("Turn Timeout")
+        if not timeout_rule or not timeout_rule.value:
+            self.turn_deadline = None
+            return
+        
+        self.turn_deadline = time.time() + timeout_rule.value
+        if self.turn_timers is not None:
+            self.turn_timers.arm(self.id, self.turn_deadline)
+
+    def turn_expired(self, now: float = None) -> bool:
+        if self.turn_deadline is None or not self.queue:
+            return False
+        return (now if now is not None else time.time()) >= self.turn_deadline
+
+    def auto_play(self) -> str:
+        """Make the current player's move for them, as the AI would, or draw."""
+        player = self.queue[0]
+        play_cmd, wild_color = player.select_card_to_play(self)
+        if play_cmd.startswith("play"):
+            result = self.play(play_cmd[5:], wild_color)
+            if len(player.hand) == 1 and not player.called:
+                self.uno(player.id)
+            return f"{player.username} ran out of time and played {play_cmd[5:]}. {result.strip()}"
+        
+        self.draw()
+        return f"{player.username} ran out of time and drew a card"
+
+    def play(self, card_str: str, wild_color: str = None) -> str:
+        if not tracer.enabled:
+            return self._play(card_str, wild_color)
+        with tracer.span("play", game=self.id, card=card_str, color=wild_color) as span:
+            result = self._play(card_str, wild_color)
+            span.set(version=self.version, queue=len(self.queue))
+            return result
+
+    def _play(self, card_str: str, wild_color: str = None) -> str:
         if not self.queue:
             return "Game has ended!"
-        print(card_str)
 
         rev_skip = self.get_rule("Reverses Skip").value
         draw_skip = self.get_rule("Draws Skip").value
@@ -167,21 +262,24 @@ class UnoGame:
         found_card_num = player.get_card(words)
         if found_card_num is not None:
             temp = next((cd for cd in player.hand if cd.get_value() == found_card_num), None)
-            card_obj = Card(temp.id, temp.color, temp.num)
-            if card_obj is None:
+            if temp is None:
                 return f"Card {found_card_num} not found in hand, it's currently {player.username}'s turn"
+            card_obj = temp.copy() if temp.wild else temp
 
             curr_card = self.discard[-1]
-            if card_obj.wild or card_obj.color == "" or curr_card.id == card_obj.id or curr_card.color == card_obj.color or curr_card.color == "":
-                self.called_out = False
-                self.discard.append(card_obj)
-
+            if legal.is_playable(card_obj, curr_card):
+                parsed_color = None
                 if card_obj.wild and wild_color:
                     parsed_color = self.queue[0].parse_color(wild_color)
-                    if parsed_color:
-                        card_obj.color = parsed_color
-                    else:
+                    if not parsed_color:
                         return "Invalid color for wild card."
+                    card_obj.color = parsed_color
+
+                self.called_out = False
+                self.discard.append(card_obj)
+                self._seen(card_obj.get_code(), player)
+                self.moves.extend(moves.encode_play(card_obj.get_code(), parsed_color))
+                self.touch()
 
                 temp_arr = []
                 done = False
@@ -192,7 +290,7 @@ class UnoGame:
                     temp_arr.append(c)
                 done = True
                 player.hand = temp_arr
-                player.sort_hand()
+                player.cards_changed()
                 prefix = ""
                 extra = ""
 
@@ -202,9 +300,11 @@ class UnoGame:
                     prefix += f"{player.username} has no more cards. They finished in rank *{len(self.finished)}*!\n\n"
 
                     if len(self.queue) == 2:
-                        prefix += self.scoreboard()
+                        self.time_finished = time.time()
                         self.finished.append(self.queue[1])
                         self.queue = []
+                        self.touch()
+                        prefix += self.scoreboard()
                         return prefix
 
                 if card_obj.id.upper() == "REVERSE":
@@ -255,11 +355,10 @@ class UnoGame:
         player = self.queue[0]
 
         if must_play == 1:
-            curr_card = self.discard[-1]
-            for card in player.hand:
-                if card.wild or card.color == "" or curr_card.id == card.id or curr_card.color == card.color:
-                    return "You must play a card if able."
+            if legal.playable_mask(player.hand_mask, self.discard[-1]):
+                return "You must play a card if able."
 
+        self.moves.append(moves.DRAW)
         card_num = self.deal(player.id, 1)
         self.next()
         return f"{card_num}"
@@ -271,6 +370,7 @@ class UnoGame:
         if self.called_out:
             return "A callout was already performed in this turn!"
 
+        self.moves.extend((moves.CALLOUT, call_player_id))
         callout_penalty = self.get_rule("Callout Penalty").value
         false_callout = self.get_rule("False Callout Penalty").value
         called_out = False
@@ -283,6 +383,7 @@ class UnoGame:
                 res += f"{player.username} you did not say UNO! Pick up {callout_penalty}\n"
         for pid in calls:
             self.deal(pid, callout_penalty)
+        self.touch()
         if not called_out:
             self.deal(call_player_id, false_callout)
             self.called_out = True
@@ -300,15 +401,20 @@ class UnoGame:
                 return "You already said UNO!"
             else:
                 player.called = True
+                self.moves.extend((moves.UNO, call_player_id))
+                self.touch()
                 return "UNO!"
         return "You have more than 1 card!"
 
+    def choose_color(self, color: str) -> str:
+        top = self.get_curr_card()
+        parsed_color = COLOR_ALIASES.get(color, "")
+        if not top.wild or not parsed_color:
+            return "Invalid color for wild card."
+        top.color = parsed_color
+        self.moves.extend(moves.encode_choose_color(parsed_color))
+        self.touch()
+        return f"The color is now {top.get_color_name() or parsed_color}"
+
     def table(self) -> str:
-        last_card = self.discard[-1]
-        ext = f"A {last_card.get_color_name()} {last_card.id} has been played!\nIt is currently {self.queue[0].username}'s turn!\n\n"
-        for idx, player in enumerate(self.queue, start=1):
-            ext += f"{idx}. {player.username} - {len(player.hand)} cards\n"
-
-        mins = int((time.time() - self.time_started) / 60)
-        ext += f"This game has lasted {mins} minutes and {self.drawn} cards have been drawn"
-        return ext
+        return self.snapshot().table()
@@ -0,0 +1,82 @@
+from typing import Iterable, List
+from  gameplay.engine.card import Card
+from  gameplay.engine.constants import CARD_TYPES, COLORS, NUM_CARD_TYPES, WILD_CARDS
+
+# A hand is encoded as a bitmask over the card type codes (bit n set when the
+# hand holds at least one card of type n), so the playable set for a given top
+# card is a single AND against a precomputed compatibility mask.
+
+COLOR_ORDER = list(COLORS)
+
+ALL_MASK = (1 << NUM_CARD_TYPES) - 1
+
+WILD_MASK = 0
+COLOR_MASKS = {color: 0 for color in COLOR_ORDER}
+RANK_MASKS = {}
+for _code, (_color, _rank) in enumerate(CARD_TYPES):
+    if _color == "":
+        WILD_MASK |= 1 << _code
+    else:
+        COLOR_MASKS[_color] |= 1 << _code
+        RANK_MASKS[_rank] = RANK_MASKS.get(_rank, 0) | 1 << _code
+
+
+def _build_compatibility() -> List[int]:
+    # Indexes 0..53 are the card types themselves; a wild on top with a chosen
+    # color only constrains by that color, so those get one extra slot each.
+    table = []
+    for color, rank in CARD_TYPES:
+        if color == "":
+            table.append(ALL_MASK)
+        else:
+            table.append(COLOR_MASKS[color] | RANK_MASKS[rank] | WILD_MASK)
+    for color in COLOR_ORDER:
+        table.append(COLOR_MASKS[color] | WILD_MASK)
+    return table
+
+
+COMPATIBLE = _build_compatibility()
+
+
+def top_code(card: Card) -> int:
+    """Index into COMPATIBLE for a card lying on top of the discard pile."""
+    if card.id in WILD_CARDS and card.color in COLORS:
+        return NUM_CARD_TYPES + COLOR_ORDER.index(card.color)
+    return card.get_code()
+
+
+def hand_mask(cards: Iterable[Card]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.get_code()
+    return mask
+
+
+def hand_counts(cards: Iterable[Card]) -> List[int]:
+    counts = [0] * NUM_CARD_TYPES
+    for card in cards:
+        counts[card.get_code()] += 1
+    return counts
+
+
+def playable_mask(mask: int, top: Card) -> int:
+    return mask & COMPATIBLE[top_code(top)]
+
+
+def is_playable(card: Card, top: Card) -> bool:
+    return bool(COMPATIBLE[top_code(top)] >> card.get_code() & 1)
+
+
+def mask_codes(mask: int) -> List[int]:
+    codes = []
+    while mask:
+        low = mask & -mask
+        codes.append(low.bit_length() - 1)
+        mask ^= low
+    return codes
+
+
+def legal_cards(cards: Iterable[Card], top: Card) -> List[Card]:
+    """Cards from the hand that may be played on top, in hand order."""
+    allowed = COMPATIBLE[top_code(top)]
+    return [card for card in cards if allowed >> card.get_code() & 1]
@@ -1,208 +1,268 @@
-import time
+import argparse
+import contextlib
+import json
 import os
+import random
+import shutil
+import sys
+import time
+from typing import Iterable, Optional, TextIO
 from  gameplay.engine.game import UnoGame
-import  gameplay.engine.card
-import  gameplay.engine.player
+from  gameplay.engine.screen import HAND_CARD_WIDTH, Screen, card_lines, hand_lines
 from  gameplay.engine.constants import *
 
-def clear_terminal():
-    os.system('cls')
+class TerminalIO:
+    """Interactive console. Everything on screen - the turn's frame, then the
+    messages, prompts and answers under it - is kept as one frame on the
+    Screen, so each change rewrites only the lines it touches. Between turns
+    a countdown frame takes the place of the last player's hand."""
 
-def countdown(seconds=5):
-    print(f"\nPass the device to the next player!")
-    for i in range(seconds, 0, -1):
-        print(f"Starting in {i}...", end='\r')
-        time.sleep(1)
-    print(" " * 20, end='\r') 
+    def __init__(self):
+        self.screen = Screen()
+        self.lines = []
 
-def print_ascii_card(card: card.Card):
+    def show(self, lines):
+        self.lines = list(lines)
+        self.screen.render(self.lines)
 
-    if card.wild:
-        symbol = "★"
-        color_name = "WILD"
-    else:
-        symbol = COLOR_SYMBOLS.get(card.color, "?")
-        color_name = card.get_color_name()
-    
-    card_display = card.id if len(card.id) <= 7 else card.id[:7]
-    
-    print("┌───────────┐")
-    print(f"│{symbol}         {symbol}│")
-    print("│           │")
-    print(f"│  {card_display:^7}  │")
-    print("│           │")
-    print(f"│{symbol}         {symbol}│")
-    print("└───────────┘")
-    print(f"  {color_name}")
-
-def print_hand_ascii(player: player.Player):
-    
-    print(f"\n{player.username}'s Hand ({len(player.hand)} cards):")
-    print("=" * 50)
-    
-    cards = player.hand
-    for i in range(0, len(cards), 5):
-        row_cards = cards[i:i+5]
-        
-        for card in row_cards:
-            print("┌─────────┐", end=" ")
-        print()
-        
-        for card in row_cards:
-            symbol = "★" if card.wild else COLOR_SYMBOLS.get(card.color, "?")
-            print(f"│{symbol}       {symbol}│", end=" ")
-        print()
-        
-        for card in row_cards:
-            print("│         │", end=" ")
-        print()
-        
-        for card in row_cards:
-            card_display = card.id if len(card.id) <= 7 else card.id[:7]
-            print(f"│ {card_display:^7} │", end=" ")
-        print()
-        
-        for card in row_cards:
-            print("│         │", end=" ")
-        print()
-        
-        for card in row_cards:
-            symbol = "★" if card.wild else COLOR_SYMBOLS.get(card.color, "?")
-            print(f"│{symbol}       {symbol}│", end=" ")
-        print()
-        
-        for card in row_cards:
-            print("└─────────┘", end=" ")
-        print()
-        
-        for card in row_cards:
-            color_name = "WILD" if card.wild else card.get_color_name()
-            print(f" {color_name:^9} ", end=" ")
-        print()
-        print() 
-
-def play_terminal_game():
-    clear_terminal()
-    print("Welcome to UNO!")
-    print("=" * 30)
-    
-    num = int(input("Enter number of players: "))
-    players = [input(f"Enter Player {i+1}'s name: ").strip() for i in range(num)]
+    def say(self, text: str):
+        self.lines.extend(text.split("\n"))
+        if self.screen.valid and len(self.lines) < shutil.get_terminal_size().lines:
+            self.screen.render(self.lines)
+        else:  # the frame no longer fits, so redrawing it would only scroll again
+            self.screen.write(text + "\n")
+
+    def ask(self, prompt: str) -> str:
+        *above, last = prompt.split("\n")
+        if above:
+            self.say("\n".join(above))
+        answer = self.screen.ask(last)
+        # The prompt and answer are on screen now; keep them in the frame.
+        self.lines.append(last + answer)
+        return answer
+
+    def pause(self, prompt: str):
+        self.ask(prompt)
+
+    def clear(self):
+        self.lines = []
+        self.screen.clear()
+
+    def countdown(self, seconds: int = 5):
+        for i in range(seconds, 0, -1):
+            self.show(["Pass the device to the next player!", f"Starting in {i}..."])
+            time.sleep(1)
+
+    def event(self, kind: str, **data):
+        pass
+
+
+class ScriptedIO(TerminalIO):
+    """Answers prompts from a command stream, one line per prompt, with no
+    clears, countdowns or pauses, and writes every prompt, answer and move to
+    a JSON lines transcript."""
+
+    def __init__(self, lines: Iterable[str], transcript: TextIO):
+        self.lines = iter(lines)
+        self.transcript = transcript
+        self.seq = 0
+
+    def show(self, lines):
+        print("\n".join(lines))
+
+    def say(self, text: str):
+        print(text)
+
+    def ask(self, prompt: str) -> str:
+        try:
+            answer = next(self.lines).rstrip("\n")
+        except StopIteration:
+            self.event("script_end", prompt=prompt.strip())
+            raise EOFError("Script ended before the game did")
+        self.event("input", prompt=prompt.strip(), value=answer)
+        return answer
+
+    def pause(self, prompt: str):
+        pass
+
+    def clear(self):
+        pass
+
+    def countdown(self):
+        pass
+
+    def event(self, kind: str, **data):
+        self.seq += 1
+        self.transcript.write(json.dumps({"seq": self.seq, "event": kind, **data}) + "\n")
+
+
+COMMAND_HELP = (
+    "",
+    "Commands:",
+    "  play <color> <number/type> - Play a card (e.g., 'play r 5', 'play b s')",
+    "  draw - Draw a card",
+    "  table - Show game status",
+    "  uno - Call UNO when you have 1 card",
+    "  callout - Call out someone for not saying UNO",
+    "  hand - Show your hand again",
+    "  quit - Exit game",
+)
+
+
+def cards_per_row() -> int:
+    """As many hand cards to a row as fit across the terminal, at least five."""
+    return max(5, shutil.get_terminal_size().columns // (HAND_CARD_WIDTH + 1))
+
+
+def play_terminal_game(io: Optional[TerminalIO] = None):
+    io = io or TerminalIO()
+    io.clear()
+    io.say("Welcome to UNO!")
+    io.say("=" * 30)
+    num = int(io.ask("Enter number of players: "))
+    players = [io.ask(f"Enter Player {i+1}'s name: ").strip() for i in range(num)]
     
     game = UnoGame()
     for player in players:
         game.add_player(player)
 
-    ai_num = int(input("Enter number of AI: "))
+    ai_num = int(io.ask("Enter number of AI: "))
     ai_players = [f"AI-{i+1}" for i in range(ai_num)]
     
     while num + ai_num < 2:
-        print("Game needs atleast 2 players")
-        num = int(input("Enter number of players: "))
+        io.say("Game needs atleast 2 players")
+        num = int(io.ask("Enter number of players: "))
 
     for player in ai_players:
         game.add_player(player, True)
     game.start()
+    io.event("start", players=[p.username for p in game.players.values()],
+             ai=[p.username for p in game.players.values() if p.is_ai])
     
-    print(f"\nGame started! {game.get_curr_player().username} goes first.")
-    input("Press Enter to continue...")
+    io.say(f"\nGame started! {game.get_curr_player().username} goes first.")
+    io.pause("Press Enter to continue...")
     
     while game.queue: 
         current_player = game.get_curr_player()
-            
-        current_card = game.get_curr_card()
-        
-        print(f"Current Player: {current_player.username}")
-        print("=" * 40)
-        
-        print("Current card on table:")
-        print_ascii_card(current_card)
+        snapshot = game.snapshot()
+        current_card = snapshot.top_card
+        io.event("turn", player=current_player.username, top_card=str(current_card),
+                 hand_size=snapshot.current.card_count)
         
+        frame = [f"Current Player: {current_player.username}", "=" * 40, "Current card on table:"]
+        frame.extend(card_lines(current_card))
         if not current_player.is_ai:
-            print_hand_ascii(current_player)
-        
-        print("\nCommands:")
-        print("  play <color> <number/type> - Play a card (e.g., 'play r 5', 'play b s')")
-        print("  draw - Draw a card")
-        print("  table - Show game status")
-        print("  uno - Call UNO when you have 1 card")
-        print("  callout - Call out someone for not saying UNO")
-        print("  hand - Show your hand again" )
-        print("  quit - Exit game")
+            frame.append("")
+            frame.extend(hand_lines(snapshot.current, cards_per_row()))
+        frame.extend(COMMAND_HELP)
+        io.show(frame)
         
         while True:
             if current_player.is_ai:
                 play_cmd, wild_color = current_player.select_card_to_play(game)
-                print(f"{current_player.username} decides: {play_cmd}")
+                io.say(f"{current_player.username} decides: {play_cmd}")
+                io.event("ai_move", player=current_player.username, command=play_cmd)
 
                 if play_cmd.startswith("play"):
                     result = game.play(play_cmd[5:], wild_color)
-                    print(result)
+                    io.say(result)
                     if len(current_player.hand) == 1 and not current_player.called:
                         uno_result = game.uno(current_player.id)
-                        print(uno_result)
+                        io.say(uno_result)
                 else:
                     result = game.draw()
-                    print(f"{current_player.username} draws a card")
+                    io.say(f"{current_player.username} draws a card")
                 break
                                                                 
             else:
 
-                command = input(f"\n{current_player.username}, enter command: ").strip().lower()
+                command = io.ask(f"\n{current_player.username}, enter command: ").strip().lower()
                 
                 if command.startswith("play "):
                     card_input = command[5:]
                     result = game.play(card_input)
-                    print(result)
+                    io.say(result)
+                    io.event("result", command=command, result=result.strip())
                     
                     if "cannot play this card" in result or "not found in hand" in result:
                         continue 
                     else:
                         if not game.queue:
-                            print("\nGame Over!")
-                            print(game.scoreboard())
+                            io.say("\nGame Over!")
+                            io.say(game.scoreboard())
+                            io.event("game_over", finished=[p.username for p in game.finished], drawn=game.drawn)
                             return
                         break  
                         
                 elif command == "draw":
                     result = game.draw()
-                    print(f"Drew card number: {result}")
+                    io.say(f"Drew card number: {result}")
+                    io.event("result", command=command, result=result)
                     break
                     
                 elif command == "table":
-                    print(game.table())
-                    
+                    io.say(game.table())
                 elif command == "uno":
                     result = game.uno(current_player.id)
-                    print(result)
+                    io.say(result)
+                    io.event("result", command=command, result=result)
                     
                 elif command == "callout":
                     result = game.callout(current_player.id)
-                    print(result)
+                    io.say(result)
+                    io.event("result", command=command, result=result.strip())
                     
                 elif command == "hand":
-                    print_hand_ascii(current_player)
+                    io.say("\n".join(hand_lines(game.snapshot().current, cards_per_row())))
                     
                 elif command == "quit":
-                    print("Thanks for playing!")
+                    io.say("Thanks for playing!")
+                    io.event("quit", player=current_player.username)
                     return
                     
                 else:
-                    print("Invalid command. Try again.")
-        
+                    io.say("Invalid command. Try again.")
         if game.discard and game.discard[-1].wild and not game.discard[-1].color:
             while True:
-                color_choice = input("Choose a color for the wild card: ").strip().lower()
+                color_choice = io.ask("Choose a color for the wild card: ").strip().lower()
                 if color_choice in COLOR_ALIASES:
-                    game.discard[-1].color = COLOR_ALIASES[color_choice]
+                    game.choose_color(color_choice)
                     break
                 else:
-                    print("Invalid color.")
-            game.play(card_input, color_choice)
-        
-        input(f"\n{current_player.username}'s turn is over. Press Enter to continue...")
-        clear_terminal()
-        countdown()
+                    io.say("Invalid color.")
+        io.pause(f"\n{current_player.username}'s turn is over. Press Enter to continue...")
+        io.countdown()
+
+    io.event("game_over", finished=[p.username for p in game.finished], drawn=game.drawn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play UNO in the terminal.")
+    parser.add_argument("--script", help="Read commands from this file ('-' for stdin) instead of prompting.")
+    parser.add_argument("--transcript", help="Write the JSON lines transcript here (default: stdout).")
+    parser.add_argument("--seed", type=int, help="Seed the shuffle so a script replays the same game.")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if not args.script:
+        play_terminal_game()
+        return
+
+    transcript = open(args.transcript, "w") if args.transcript else sys.stdout
+    script = sys.stdin if args.script == "-" else open(args.script)
+    try:
+        with open(os.devnull, "w") as screen, contextlib.redirect_stdout(screen):
+            play_terminal_game(ScriptedIO(script, transcript))
+    except EOFError:
+        pass
+    finally:
+        if script is not sys.stdin:
+            script.close()
+        if transcript is not sys.stdout:
+            transcript.close()
+
 
 if __name__ == "__main__":
-    play_terminal_game()
+    main()
@@ -0,0 +1,176 @@
+import base64
+import copy
+import pickle
+import random
+import sys
+import tracemalloc
+from typing import Dict, Iterable, List, Optional
+from  gameplay.engine.card import CARD_PROTOTYPES
+from  gameplay.engine.game import UnoGame
+
+# The card prototypes are shared by every game in the process, so they are
+# never attributed to a single game.
+SHARED_IDS = frozenset(id(card) for card in CARD_PROTOTYPES)
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Size in bytes of obj and everything it references, counting each object once."""
+    if seen is None:
+        seen = set(SHARED_IDS)
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        else:
+            if hasattr(item, "__dict__"):
+                stack.append(item.__dict__)
+            for slot in getattr(type(item), "__slots__", ()):
+                if hasattr(item, slot):
+                    stack.append(getattr(item, slot))
+    return total
+
+
+def traced_size(obj) -> int:
+    """Bytes allocated, as seen by tracemalloc, when building a private copy of obj."""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        memo = {id(card): card for card in CARD_PROTOTYPES}
+        before = tracemalloc.get_traced_memory()[0]
+        clone = copy.deepcopy(obj, memo)
+        after = tracemalloc.get_traced_memory()[0]
+        del clone
+        return max(0, after - before)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def session_payload_size(game: UnoGame) -> int:
+    """Length of the game as stored in the session (base64 of the pickle)."""
+    return len(base64.b64encode(pickle.dumps(game)))
+
+
+def components(game: UnoGame, messages: Optional[List[str]] = None) -> Dict[str, object]:
+    parts = {
+        "deck": game.deck,
+        "discard": game.discard,
+        "moves": game.moves,
+        "hands": [player.hand for player in game.players.values()],
+        "players": [
+            {k: v for k, v in vars(player).items() if k != "hand"}
+            for player in game.players.values()
+        ],
+        "rules": game.rules,
+    }
+    if messages is not None:
+        parts["messages"] = messages
+    return parts
+
+
+def footprint(game: UnoGame, messages: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Deep and tracemalloc-attributed size of each component of a game.
+
+    `messages` is the game's message log, which the web app keeps next to the
+    game in the session rather than on it.
+    """
+    report = {}
+    for name, part in components(game, messages).items():
+        report[name] = {"deep": deep_sizeof(part), "traced": traced_size(part)}
+    report["total"] = {"deep": deep_sizeof(game), "traced": traced_size(game)}
+    report["session_payload"] = {"deep": session_payload_size(game), "traced": 0}
+    return report
+
+
+def apply_rules(game: UnoGame, overrides: Dict[str, int]):
+    for name, value in overrides.items():
+        rule = game.get_rule(name)
+        if not rule:
+            raise Exception(f"Rule '{name}' not found")
+        rule.value = max(rule.min, min(rule.max, int(value)))
+
+
+def new_game(players: int, overrides: Dict[str, int], seed: Optional[int] = None) -> UnoGame:
+    game = UnoGame(seed=seed)
+    apply_rules(game, overrides)
+    for i in range(players):
+        game.add_player(f"AI-{i+1}", True)
+    game.start()
+    return game
+
+
+def play_turn(game: UnoGame):
+    player = game.get_curr_player()
+    play_cmd, wild_color = player.select_card_to_play(game)
+    if play_cmd.startswith("play"):
+        game.play(play_cmd[5:], wild_color)
+        if len(player.hand) == 1 and not player.called:
+            game.uno(player.id)
+    else:
+        game.draw()
+
+
+def growth_test(turns: int, players: int = 4, overrides: Optional[Dict[str, int]] = None,
+                sample_every: int = 100, seed: Optional[int] = None) -> Dict[str, object]:
+    """Play AI turns (starting new games as they finish) and sample memory.
+
+    Returns the samples plus the traced process memory right after each new
+    game starts; those baselines should stay flat if nothing leaks between
+    games, and `max_discard` shows how far the discard pile grows between
+    reshuffles.
+    """
+    overrides = overrides or {}
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        # Later games take their seeds from the run's seed, so a seeded run
+        # replays the same games without touching the global random state.
+        seeds = random.Random(seed)
+        game = new_game(players, overrides, seed)
+        baselines = [tracemalloc.get_traced_memory()[0]]
+        samples = []
+        max_discard = 0
+        for turn in range(1, turns + 1):
+            if not game.queue:
+                game = new_game(players, overrides, seeds.getrandbits(32))
+                baselines.append(tracemalloc.get_traced_memory()[0])
+            play_turn(game)
+            max_discard = max(max_discard, len(game.discard))
+            if turn % sample_every == 0:
+                samples.append({
+                    "turn": turn,
+                    "game_bytes": deep_sizeof(game),
+                    "discard": len(game.discard),
+                    "deck": len(game.deck),
+                    "hand_cards": sum(len(p.hand) for p in game.players.values()),
+                    "traced": tracemalloc.get_traced_memory()[0],
+                })
+        return {
+            "samples": samples,
+            "baselines": baselines,
+            "games": len(baselines),
+            "max_discard": max_discard,
+            "baseline_growth": baselines[-1] - baselines[0],
+        }
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def format_report(report: Dict[str, Dict[str, int]]) -> Iterable[str]:
+    yield f"{'component':<18}{'deep bytes':>12}{'traced bytes':>14}"
+    for name, sizes in report.items():
+        yield f"{name:<18}{sizes['deep']:>12}{sizes['traced']:>14}"
@@ -0,0 +1,61 @@
+from typing import Iterator, Optional, Tuple
+from  gameplay.engine.constants import CARD_TYPES, COLOR_ALIASES, NUM_CARD_TYPES, WILD_CARDS
+
+# Moves are packed into one or two bytes:
+#   0..53                        play the card with that type code (a wild without a colour)
+#   PLAY_COLORED_WILD + i        play a wild with a colour, i = wild index * len(MOVE_COLORS) + colour
+#   CHOOSE_COLOR + c             choose the colour of the wild on top of the discard pile
+#   DRAW                         draw a card
+#   CALLOUT, player id           call out the players who did not say UNO
+#   UNO, player id               say UNO
+
+MOVE_COLORS = list(dict.fromkeys(COLOR_ALIASES.values()))
+
+PLAY_COLORED_WILD = NUM_CARD_TYPES
+CHOOSE_COLOR = PLAY_COLORED_WILD + len(WILD_CARDS) * len(MOVE_COLORS)
+DRAW = 0xF0
+CALLOUT = 0xF1
+UNO = 0xF2
+
+Move = Tuple[str, Optional[int], Optional[str]]
+
+
+def encode_play(code: int, color: Optional[str] = None) -> Tuple[int, ...]:
+    rank = CARD_TYPES[code][1]
+    if color and rank in WILD_CARDS:
+        return (PLAY_COLORED_WILD + WILD_CARDS.index(rank) * len(MOVE_COLORS) + MOVE_COLORS.index(color),)
+    return (code,)
+
+
+def encode_choose_color(color: str) -> Tuple[int, ...]:
+    return (CHOOSE_COLOR + MOVE_COLORS.index(color),)
+
+
+def decode(buf, offset: int = 0) -> Tuple[Move, int]:
+    """Decode the move starting at `offset`; returns it with the offset of the next one.
+
+    A move is (kind, number, color): the card code for "play", the player id
+    for "callout" and "uno", otherwise None.
+    """
+    byte = buf[offset]
+    if byte < PLAY_COLORED_WILD:
+        return ("play", byte, None), offset + 1
+    if byte < CHOOSE_COLOR:
+        wild, color = divmod(byte - PLAY_COLORED_WILD, len(MOVE_COLORS))
+        return ("play", NUM_CARD_TYPES - len(WILD_CARDS) + wild, MOVE_COLORS[color]), offset + 1
+    if byte < CHOOSE_COLOR + len(MOVE_COLORS):
+        return ("choose_color", None, MOVE_COLORS[byte - CHOOSE_COLOR]), offset + 1
+    if byte == DRAW:
+        return ("draw", None, None), offset + 1
+    if byte == CALLOUT:
+        return ("callout", buf[offset + 1], None), offset + 2
+    if byte == UNO:
+        return ("uno", buf[offset + 1], None), offset + 2
+    raise ValueError(f"Unknown move byte {byte} at offset {offset}")
+
+
+def iter_moves(buf) -> Iterator[Move]:
+    offset = 0
+    while offset < len(buf):
+        move, offset = decode(buf, offset)
+        yield move
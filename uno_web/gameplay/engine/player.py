@@ -1,7 +1,16 @@
 from typing import List, Optional
 from  gameplay.engine.card import Card 
 from  gameplay.engine.constants import *
+from  gameplay.engine import legal
+from  gameplay.engine.snapshot import format_hand
+from  gameplay.engine.trace import tracer
 class Player:
+    # UnseenCards of the cards this player has not seen; kept for AI seats
+    # only (set by UnoGame.start()).
+    unseen = None
+    # Cards dealt to this player over the game.
+    drawn = 0
+
     def __init__(self, player_id: int, username: str, is_ai: bool = False):
         self.id = player_id
         self.is_ai = is_ai
@@ -9,9 +18,16 @@ class Player:
         self.hand: List[Card] = []
         self.called = False
         self.finished = False
+        self.hand_mask = 0
 
     def cards_changed(self):
         self.sort_hand()
+        self.hand_mask = legal.hand_mask(self.hand)
+
+    def playable_cards(self, top: Card) -> List[Card]:
+        if not legal.playable_mask(self.hand_mask, top):
+            return []
+        return legal.legal_cards(self.hand, top)
 
     def sort_hand(self):
         self.hand.sort()
@@ -70,12 +86,17 @@ class Player:
 
 
     def get_hand(self) -> str:
-        self.sort_hand()
-        hand_str = " | ".join([f"**{str(card)}**" for card in self.hand])
-        return f"Here is your hand:\n\n{hand_str}\n\nYou currently have {len(self.hand)} card(s)."
+        return format_hand(self.hand)
 
     def select_card_to_play(self, game) -> tuple:
-
+        if not tracer.enabled:
+            return self._select_card_to_play(game)
+        with tracer.span("ai_decision", game=game.id, player=self.id, hand=len(self.hand)) as span:
+            choice = self._select_card_to_play(game)
+            span.set(choice=choice[0], color=choice[1])
+            return choice
+
+    def _select_card_to_play(self, game) -> tuple:
         current_card = game.get_curr_card()
         hand = self.hand[:]
         hold_numbers = set()
@@ -88,44 +109,32 @@ class Player:
             if len(colors) > 1:
                 hold_numbers.add(num)
 
-        for card in hand:
-            if (card.id in ["+2", "SKIP", "REVERSE", "WILD+4"] or card.wild) and (
-                card.wild or card.color == current_card.color or card.id == current_card.id
-            ):
+        playable = self.playable_cards(current_card)
+
+        for card in playable:
+            if card.id in ["+2", "SKIP", "REVERSE", "WILD+4"] or card.wild:
                 if card.wild:
                     color_counts = {}
                     for c in hand:
                         if c.color and not c.wild:
                             color_counts[c.color] = color_counts.get(c.color, 0) + 1
-                    best_color = max(color_counts, key=color_counts.get) if color_counts else "R"
+                    # The colour we hold most of; between equals, the one with the fewest
+                    # unseen cards, which opponents are least likely to be able to follow.
+                    unseen = self.unseen.color_counts() if self.unseen is not None else {}
+                    best_color = max(COLORS, key=lambda color: (color_counts.get(color, 0), -unseen.get(color, 0)))
                     return (f"play {card.id.lower()} {best_color.lower()}", best_color)
                 return (f"play {card.color.lower()} {card.id.lower()}", None)
 
-        for card in hand:
-            if not card.wild and card.id not in hold_numbers and (
-                card.color == current_card.color or card.id == current_card.id
-            ):
+        for card in playable:
+            if not card.wild and card.id not in hold_numbers:
                 return (f"play {card.color.lower()} {card.id.lower()}", None)
 
-        for card in hand:
-            if not card.wild and card.id in hold_numbers and (
-                card.color == current_card.color or card.id == current_card.id
-            ):
+        for card in playable:
+            if not card.wild and card.id in hold_numbers:
                 return (f"play {card.color.lower()} {card.id.lower()}", None)
 
         if len(self.hand) == 2 and not self.called:
             game.uno(self.id)
 
-        for card in hand:
-            if card.wild or card.color == current_card.color or card.id == current_card.id:
-                if card.wild:
-                    color_counts = {}
-                    for c in hand:
-                        if c.color and not c.wild:
-                            color_counts[c.color] = color_counts.get(c.color, 0) + 1
-                    best_color = max(color_counts, key=color_counts.get) if color_counts else "R"
-                    return (f"play {card.id.lower()} {best_color.lower()}", best_color)
-                return (f"play {card.color.lower()} {card.id.lower()}", None)
-
         return ("draw", None)
 
@@ -0,0 +1,152 @@
+import mmap
+import os
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+from  gameplay.engine.constants import CARD_TYPES
+from  gameplay.engine.game import UnoGame
+from  gameplay.engine import moves
+
+try:
+    import fcntl
+except ImportError:  # no file locking on Windows; appends are then only safe within one process
+    fcntl = None
+
+# An archive is MAGIC followed by one record per finished game:
+#   u32 length of the rest of the record
+#   u32 seed, u32 start time (unix seconds), u8 rule count, u16 per rule value
+#   u8 seat count, per seat: u8 is_ai, u8 name length, name (utf-8)
+#   the game's moves, packed as in gameplay.engine.moves, up to the end
+MAGIC = b"UNOR\x01"
+_LENGTH = struct.Struct("<I")
+_HEADER = struct.Struct("<IIB")
+_RULE = struct.Struct("<H")
+_SEAT = struct.Struct("<BB")
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    seed: int
+    started: int
+    rules: Tuple[int, ...]
+    seats: Tuple[Tuple[str, bool], ...]
+    moves: memoryview
+
+    def iter_moves(self) -> Iterator[moves.Move]:
+        return moves.iter_moves(self.moves)
+
+
+def encode_record(game: UnoGame) -> bytes:
+    body = bytearray(_HEADER.pack(game.seed, int(game.time_started), len(game.rules)))
+    for rule in game.rules:
+        body += _RULE.pack(rule.value)
+    body += bytes([len(game.players)])
+    for player in game.players.values():
+        # Cut to 255 bytes without splitting a character.
+        name = player.username.encode()[:255].decode("utf-8", "ignore").encode()
+        body += _SEAT.pack(int(player.is_ai), len(name)) + name
+    body += game.moves.tobytes()
+    return _LENGTH.pack(len(body)) + bytes(body)
+
+
+def decode_record(buf: memoryview) -> GameRecord:
+    """Decode a record body (without its length prefix); moves stay a view into buf."""
+    seed, started, rule_count = _HEADER.unpack_from(buf, 0)
+    offset = _HEADER.size
+    rules = tuple(_RULE.unpack_from(buf, offset + i * _RULE.size)[0] for i in range(rule_count))
+    offset += rule_count * _RULE.size
+    seats = []
+    seat_count = buf[offset]
+    offset += 1
+    for _ in range(seat_count):
+        is_ai, length = _SEAT.unpack_from(buf, offset)
+        offset += _SEAT.size
+        seats.append((bytes(buf[offset:offset + length]).decode(), bool(is_ai)))
+        offset += length
+    return GameRecord(seed, started, rules, tuple(seats), buf[offset:])
+
+
+def replay(record: GameRecord, upto: Optional[int] = None) -> UnoGame:
+    """Rebuild the game of a record after its first `upto` moves (all by default)."""
+    game = UnoGame(seed=record.seed)
+    game.turn_timers = None
+    for rule, value in zip(game.rules, record.rules):
+        rule.value = value
+    for name, is_ai in record.seats:
+        game.add_player(name, is_ai)
+    game.start()
+    game.time_started = record.started
+
+    for i, (kind, number, color) in enumerate(record.iter_moves()):
+        if upto is not None and i >= upto:
+            break
+        if kind == "play":
+            card_color, rank = CARD_TYPES[number]
+            game.play(f"{card_color} {rank}".strip().lower(), color)
+        elif kind == "choose_color":
+            game.choose_color(color)
+        elif kind == "draw":
+            game.draw()
+        elif kind == "callout":
+            game.callout(number)
+        elif kind == "uno":
+            game.uno(number)
+    return game
+
+
+class ReplayArchive:
+    """Append-only file of finished games in the compact replay format.
+
+    Appends hold a lock on the file, against other threads and, where
+    supported, other processes, so records are never interleaved.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+
+    def append(self, game: UnoGame):
+        data = encode_record(game)
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if f.seek(0, os.SEEK_END) == 0:
+                        f.write(MAGIC)
+                    f.write(data)
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def records(self) -> Iterator[GameRecord]:
+        """Stream the records from the file, reading one at a time."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a replay archive")
+            while True:
+                prefix = f.read(_LENGTH.size)
+                if len(prefix) < _LENGTH.size:
+                    return
+                (length,) = _LENGTH.unpack(prefix)
+                yield decode_record(memoryview(f.read(length)))
+
+    def mapped(self) -> Iterator[GameRecord]:
+        """Iterate the records straight out of a memory map of the file, without copying."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= len(MAGIC):
+            return
+        with open(self.path, "rb") as f:
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        if buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a replay archive")
+        offset = len(MAGIC)
+        while offset + _LENGTH.size <= len(buf):
+            (length,) = _LENGTH.unpack_from(buf, offset)
+            offset += _LENGTH.size
+            yield decode_record(buf[offset:offset + length])
+            offset += length
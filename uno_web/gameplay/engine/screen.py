@@ -0,0 +1,123 @@
+import functools
+import shutil
+import sys
+from typing import List, Optional, Sequence, TextIO, Tuple
+from  gameplay.engine.card import Card
+from  gameplay.engine.constants import COLOR_SYMBOLS
+from  gameplay.engine.snapshot import PlayerView
+
+CLEAR = "\x1b[H\x1b[2J"
+HAND_CARD_WIDTH = 11
+
+
+def _face(card: Card) -> Tuple[str, str, str]:
+    if card.wild:
+        return "★", card.id[:7], "WILD"
+    return COLOR_SYMBOLS.get(card.color, "?"), card.id[:7], card.get_color_name()
+
+
+@functools.lru_cache(maxsize=None)
+def _big_glyph(symbol: str, label: str, color_name: str) -> Tuple[str, ...]:
+    return (
+        "┌───────────┐",
+        f"│{symbol}         {symbol}│",
+        "│           │",
+        f"│  {label:^7}  │",
+        "│           │",
+        f"│{symbol}         {symbol}│",
+        "└───────────┘",
+        f"  {color_name}",
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _small_glyph(symbol: str, label: str, color_name: str) -> Tuple[str, ...]:
+    return (
+        "┌─────────┐",
+        f"│{symbol}       {symbol}│",
+        "│         │",
+        f"│ {label:^7} │",
+        "│         │",
+        f"│{symbol}       {symbol}│",
+        "└─────────┘",
+        f" {color_name:^9} ",
+    )
+
+
+def card_lines(card: Card) -> Tuple[str, ...]:
+    """The large drawing of a card (the one on the table), rendered once per card face."""
+    return _big_glyph(*_face(card))
+
+
+def hand_lines(player: PlayerView, per_row: int = 5) -> List[str]:
+    """A hand drawn as rows of small cards, `per_row` to a row."""
+    cards = player.hand
+    lines = [f"{player.username}'s Hand ({len(cards)} cards):", "=" * 50]
+    for i in range(0, len(cards), per_row):
+        glyphs = [_small_glyph(*_face(card)) for card in cards[i:i + per_row]]
+        lines.extend(" ".join(row).rstrip() for row in zip(*glyphs))
+        lines.append("")
+    return lines
+
+
+class Screen:
+    """Draws whole frames on an ANSI terminal, rewriting only the lines that changed.
+
+    A frame is a list of lines. render() compares it with the frame on
+    screen, moves the cursor to each changed line and rewrites just that
+    line, clears whatever is left below the new frame (text written after the
+    last frame included), and sends it all in one write. Text written with
+    write() or prompted for by ask() is counted, so once the screen has
+    scrolled, or the frame no longer fits, the next frame is redrawn in full.
+    """
+
+    def __init__(self, out: Optional[TextIO] = None):
+        self.out = out or sys.stdout
+        self.rows: List[str] = []
+        self.below = 0
+        self.valid = False
+
+    def render(self, lines: Sequence[str]):
+        height = shutil.get_terminal_size().lines
+        if not self.valid or len(self.rows) + self.below >= height or len(lines) >= height:
+            buffer = CLEAR + "\n".join(lines) + "\n"
+        else:
+            parts = []
+            old = self.rows
+            for i, line in enumerate(lines):
+                if i >= len(old) or old[i] != line:
+                    parts.append(f"\x1b[{i + 1};1H{line}\x1b[K")
+            parts.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+            buffer = "".join(parts)
+        self.rows = list(lines)
+        self.below = 0
+        # A frame taller than the terminal scrolls, so the next one starts over.
+        self.valid = len(lines) < height
+        self._send(buffer)
+
+    def write(self, text: str):
+        """Write text under the frame."""
+        self.below += text.count("\n")
+        self._send(text)
+
+    def ask(self, prompt: str) -> str:
+        self.below += prompt.count("\n") + 1
+        self.out.flush()
+        return input(prompt)
+
+    def clear(self):
+        self.rows = []
+        self.below = 0
+        self.valid = True
+        self._send(CLEAR)
+
+    def _send(self, text: str):
+        out = self.out
+        buffer = getattr(out, "buffer", None)
+        if buffer is not None:
+            out.flush()
+            buffer.write(text.encode(out.encoding or "utf-8", "replace"))
+            buffer.flush()
+        else:
+            out.write(text)
+            out.flush()
@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+from  gameplay.engine.card import Card
+
+
+def format_hand(cards: Iterable[Card]) -> str:
+    cards = list(cards)
+    hand_str = " | ".join([f"**{str(card)}**" for card in cards])
+    return f"Here is your hand:\n\n{hand_str}\n\nYou currently have {len(cards)} card(s)."
+
+
+@dataclass(frozen=True)
+class PlayerView:
+    id: int
+    username: str
+    is_ai: bool
+    called: bool
+    finished: bool
+    hand: Tuple[Card, ...]
+
+    @property
+    def card_count(self) -> int:
+        return len(self.hand)
+
+    def hand_text(self) -> str:
+        return format_hand(self.hand)
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """Everything the renderers need from one version of a game.
+
+    Built by UnoGame.snapshot() and reused until the game changes again, so
+    the terminal printers, table/scoreboard text and the web views walk the
+    players and cards only once per version.
+    """
+    game_id: str
+    version: int
+    top_card: Optional[Card]
+    recent_discard: Tuple[Card, ...]
+    players: Tuple[PlayerView, ...]
+    finished: Tuple[PlayerView, ...]
+    time_started: float
+    drawn: int
+    deck_count: int
+
+    @property
+    def current(self) -> Optional[PlayerView]:
+        return self.players[0] if self.players else None
+
+    @property
+    def game_over(self) -> bool:
+        return not self.players
+
+    def minutes(self, now: float = None) -> int:
+        return int(((now if now is not None else time.time()) - self.time_started) / 60)
+
+    def table(self) -> str:
+        last_card = self.top_card
+        lines = [
+            f"A {last_card.get_color_name()} {last_card.id} has been played!",
+            f"It is currently {self.players[0].username}'s turn!",
+            "",
+        ]
+        lines.extend(f"{idx}. {player.username} - {player.card_count} cards"
+                     for idx, player in enumerate(self.players, start=1))
+        lines.append(f"This game has lasted {self.minutes()} minutes and {self.drawn} cards have been drawn")
+        return "\n".join(lines)
+
+    def scoreboard(self) -> str:
+        lines = [f"{rank}. *{person.username}*" for rank, person in enumerate(self.finished, start=1)]
+        lines.append(f"\nThis game lasted {self.minutes()} minutes and {self.drawn} cards were drawn")
+        return "\n".join(lines)
+
+
+def player_view(player) -> PlayerView:
+    return PlayerView(player.id, player.username, player.is_ai, player.called, player.finished, tuple(player.hand))
+
+
+def take_snapshot(game) -> GameSnapshot:
+    return GameSnapshot(
+        game_id=game.id,
+        version=game.version,
+        top_card=game.discard[-1] if game.discard else None,
+        recent_discard=tuple(reversed(game.discard[-5:])),
+        players=tuple(player_view(p) for p in game.queue),
+        finished=tuple(player_view(p) for p in game.finished),
+        time_started=game.time_started,
+        drawn=game.drawn,
+        deck_count=len(game.deck),
+    )
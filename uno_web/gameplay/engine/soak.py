@@ -0,0 +1,186 @@
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+from  gameplay.engine.game import UnoGame
+from  gameplay.engine import memory
+
+
+def card_count(game: UnoGame) -> int:
+    return len(game.deck) + len(game.discard) + sum(len(player.hand) for player in game.players.values())
+
+
+def draw_turn(game: UnoGame):
+    """Draw on every turn until the hands hold most of the cards, then play
+    whenever able, so the discard pile keeps being reshuffled into the deck
+    and draw cards played still deal."""
+    player = game.get_curr_player()
+    if len(player.hand) * (len(game.players) + 1) < card_count(game):
+        game.draw()
+    else:
+        memory.play_turn(game)
+
+
+def false_callout_turn(game: UnoGame):
+    """Call out on every turn before playing, usually with nobody to catch."""
+    game.called_out = False
+    game.callout(game.get_curr_player().id)
+    memory.play_turn(game)
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    overrides: Dict[str, int]
+    turn: Callable[[UnoGame], None] = memory.play_turn
+    # Whether every window should see reshuffles and penalty deals.
+    cycles: bool = False
+
+
+SCENARIOS: Dict[str, Scenario] = {scenario.name: scenario for scenario in [
+    Scenario("normal", "AI players with the default rules, starting a new game when one ends.", {}),
+    Scenario("long", "Very long games: eight decks and 200 starting cards each.",
+             {"Decks": 8, "Initial Cards": 200}),
+    Scenario("draws", "Every player draws on every turn, playing only once the hands hold most of the cards.",
+             {}, draw_turn, cycles=True),
+    Scenario("false_callouts", "A false callout with the 1000 card penalty before every move.",
+             {"Decks": 8, "False Callout Penalty": 1000}, false_callout_turn, cycles=True),
+]}
+
+
+@dataclass
+class Window:
+    turn: int
+    median_us: float
+    p99_us: float
+    traced: int
+    discard: int
+    deck: int
+    largest_hand: int
+    shuffles: int
+    penalties: int
+
+
+@dataclass
+class SoakResult:
+    scenario: str
+    turns: int
+    games: int
+    windows: List[Window] = field(default_factory=list)
+    latency_exponent: float = 0.0
+    memory_exponent: float = 0.0
+    flags: List[str] = field(default_factory=list)
+
+
+def hoarded(game: UnoGame) -> bool:
+    """Whether one hand holds over half the cards, leaving too few to deal or reshuffle."""
+    return max(len(player.hand) for player in game.queue) * 2 > card_count(game)
+
+
+def growth_exponent(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope of log(y) against log(x).
+
+    Roughly 0 for a flat series and 1 for one growing linearly with x.
+    """
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+def detect_drift(result: SoakResult, latency_limit: float = 0.25, memory_limit: float = 1.0):
+    """Flag per-turn latency that keeps rising (so total time grows superlinearly
+    with turns) and memory that grows faster than linearly.
+
+    The first window is left out of the fit, since it includes dealing and a
+    cold start.
+    """
+    windows = result.windows[1:] if len(result.windows) > 2 else result.windows
+    turns = [w.turn for w in windows]
+    result.latency_exponent = growth_exponent(turns, [w.median_us for w in windows])
+    result.memory_exponent = growth_exponent(turns, [w.traced for w in windows])
+    if result.latency_exponent > latency_limit:
+        result.flags.append(f"per-turn latency grows ~turn^{result.latency_exponent:.2f}")
+    if result.memory_exponent > memory_limit:
+        result.flags.append(f"memory grows ~turn^{result.memory_exponent:.2f}")
+
+
+def detect_stall(result: SoakResult):
+    """Flag windows after the first with no reshuffles or no penalty deals: the
+    games stopped cycling cards, so the windows time a frozen game."""
+    for w in result.windows[1:]:
+        if not w.shuffles or not w.penalties:
+            result.flags.append(f"stalled by turn {w.turn}: {w.shuffles} reshuffles, {w.penalties} penalty deals")
+            return
+
+
+def soak(scenario: Scenario, turns: int, players: int = 4, window: int = 1000,
+         seed: Optional[int] = None, trace_memory: bool = True,
+         overrides: Optional[Dict[str, int]] = None, latency_limit: float = 0.25) -> SoakResult:
+    """Play `turns` turns of a scenario, sampling latency and memory every `window` turns."""
+    rules = dict(scenario.overrides, **(overrides or {}))
+    started = trace_memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        seeds = random.Random(seed)
+        game = memory.new_game(players, rules, seed)
+        result = SoakResult(scenario.name, turns, 1)
+        samples: List[int] = []
+        shuffles = penalties = 0
+        for turn in range(1, turns + 1):
+            # A game where one player holds most of the cards has nothing left to cycle.
+            if not game.queue or hoarded(game):
+                game = memory.new_game(players, rules, seeds.getrandbits(32))
+                result.games += 1
+            shuffled, drawn = game.shuffles, game.drawn
+            begin = time.perf_counter_ns()
+            scenario.turn(game)
+            samples.append(time.perf_counter_ns() - begin)
+            shuffles += game.shuffles - shuffled
+            # A draw deals one card; +2s, +4s and callouts deal more.
+            penalties += game.drawn - drawn > 1
+
+            if turn % window == 0 or turn == turns:
+                samples.sort()
+                result.windows.append(Window(
+                    turn=turn,
+                    median_us=statistics.median(samples) / 1000,
+                    p99_us=samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000,
+                    traced=tracemalloc.get_traced_memory()[0] if trace_memory else 0,
+                    discard=len(game.discard),
+                    deck=len(game.deck),
+                    largest_hand=max((len(p.hand) for p in game.queue), default=0),
+                    shuffles=shuffles,
+                    penalties=penalties,
+                ))
+                samples = []
+                shuffles = penalties = 0
+        detect_drift(result, latency_limit)
+        if scenario.cycles:
+            detect_stall(result)
+        return result
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def format_result(result: SoakResult):
+    yield f"{result.scenario}: {result.turns} turns over {result.games} game(s)"
+    yield (f"{'turn':>9}{'median us':>11}{'p99 us':>10}{'traced':>12}{'discard':>9}{'deck':>7}{'max hand':>10}"
+           f"{'shuffles':>10}{'penalties':>11}")
+    for w in result.windows:
+        yield (f"{w.turn:>9}{w.median_us:>11.1f}{w.p99_us:>10.1f}{w.traced:>12}"
+               f"{w.discard:>9}{w.deck:>7}{w.largest_hand:>10}{w.shuffles:>10}{w.penalties:>11}")
+    yield f"latency exponent {result.latency_exponent:.2f}, memory exponent {result.memory_exponent:.2f}"
+    for flag in result.flags:
+        yield f"DRIFT: {flag}"
@@ -0,0 +1,331 @@
+import random
+from dataclasses import dataclass, replace
+from typing import Iterator, List, Optional, Sequence, Tuple
+from  gameplay.engine import legal
+from  gameplay.engine.constants import CARD_TYPES, COLORS, NUM_CARD_TYPES, WILD_CARDS
+from  gameplay.engine.game import UnoGame, deck_template
+from  gameplay.engine.moves import Move
+
+# Persistent stacks are cons cells (item, rest) with the top first and None
+# for the empty stack, so pushing and popping share everything underneath.
+Stack = Optional[Tuple[object, "Stack"]]
+
+RULE_INDEX = {rule.name: i for i, rule in enumerate(UnoGame.generate_rules())}
+EMPTY_HAND = (0,) * NUM_CARD_TYPES
+
+
+def _push(stack: Stack, item) -> Stack:
+    return (item, stack)
+
+
+def _items(stack: Stack) -> Iterator:
+    """Items of a stack from the top down."""
+    while stack is not None:
+        yield stack[0]
+        stack = stack[1]
+
+
+def _stack(items: Sequence) -> Stack:
+    """Stack whose top is the last of `items`."""
+    stack = None
+    for item in items:
+        stack = (item, stack)
+    return stack
+
+
+def _with(items: tuple, index: int, value) -> tuple:
+    return items[:index] + (value,) + items[index + 1:]
+
+
+@dataclass(frozen=True)
+class GameState:
+    """Immutable UNO game state with structural sharing.
+
+    Applying a move returns a new state that shares everything the move did
+    not touch: the deck and discard pile are persistent stacks, each hand is a
+    tuple of per card type counts, and the turn ring, called flags and
+    finishing order are small tuples. A move costs O(cards moved + players)
+    instead of a deep copy, so keeping every state (undo, forks for rollouts)
+    is cheap. Moves follow UnoGame exactly; see gameplay.engine.moves for
+    their encoding.
+    """
+    seed: int
+    rules: Tuple[int, ...]
+    deck: Stack
+    deck_size: int
+    discard: Stack              # (card code, colour) entries
+    discard_size: int
+    hands: Tuple[Tuple[int, ...], ...]
+    hand_sizes: Tuple[int, ...]
+    queue: Tuple[int, ...]
+    called: Tuple[bool, ...]
+    finished: Tuple[int, ...] = ()
+    called_out: bool = False
+    drawn: int = 0
+    shuffles: int = 0
+
+    @staticmethod
+    def start(players: int, rules: Optional[Sequence[int]] = None, seed: Optional[int] = None) -> "GameState":
+        """Shuffle and deal as UnoGame.start() does for a game with the same seed and rules."""
+        if rules is None:
+            rules = [rule.value for rule in UnoGame.generate_rules()]
+        seed = random.getrandbits(32) if seed is None else seed
+        deck = list(deck_template(rules[RULE_INDEX["Decks"]]))
+        random.Random(f"{seed}:0").shuffle(deck)
+        first = deck.pop()
+        initial = rules[RULE_INDEX["Initial Cards"]]
+        if players < 2:
+            raise Exception("Need at least two players to start!")
+        if initial * players > len(deck):
+            raise Exception("Did not find enough cards to start playing")
+
+        state = GameState(
+            seed=seed,
+            rules=tuple(rules),
+            deck=_stack(deck),
+            deck_size=len(deck),
+            discard=_stack([(first, "")]),
+            discard_size=1,
+            hands=(EMPTY_HAND,) * players,
+            hand_sizes=(0,) * players,
+            queue=tuple(range(players)),
+            called=(False,) * players,
+            shuffles=1,
+        )
+        for seat in range(players):
+            state = state._deal(seat, initial)
+        return state
+
+    @staticmethod
+    def from_game(game: UnoGame) -> "GameState":
+        hands = []
+        for player in game.players.values():
+            counts = [0] * NUM_CARD_TYPES
+            for card in player.hand:
+                counts[card.get_code()] += 1
+            hands.append(tuple(counts))
+        return GameState(
+            seed=game.seed,
+            rules=tuple(rule.value for rule in game.rules),
+            deck=_stack(game.deck),
+            deck_size=len(game.deck),
+            discard=_stack([(card.get_code(), card.color if card.wild else "") for card in game.discard]),
+            discard_size=len(game.discard),
+            hands=tuple(hands),
+            hand_sizes=tuple(len(player.hand) for player in game.players.values()),
+            queue=tuple(player.id for player in game.queue),
+            called=tuple(player.called for player in game.players.values()),
+            finished=tuple(player.id for player in game.finished),
+            called_out=game.called_out,
+            drawn=game.drawn,
+            shuffles=game.shuffles,
+        )
+
+    def rule(self, name: str) -> int:
+        return self.rules[RULE_INDEX[name]]
+
+    @property
+    def top(self) -> Tuple[int, str]:
+        return self.discard[0]
+
+    @property
+    def game_over(self) -> bool:
+        return not self.queue
+
+    def deck_codes(self) -> List[int]:
+        """The deck bottom first, as UnoGame stores it."""
+        return list(_items(self.deck))[::-1]
+
+    def discard_cards(self) -> List[Tuple[int, str]]:
+        """The discard pile bottom first, as UnoGame stores it."""
+        return list(_items(self.discard))[::-1]
+
+    def _top_index(self) -> int:
+        code, color = self.top
+        if CARD_TYPES[code][1] in WILD_CARDS and color in COLORS:
+            return NUM_CARD_TYPES + legal.COLOR_ORDER.index(color)
+        return code
+
+    def playable_mask(self, seat: int) -> int:
+        mask = 0
+        for code, count in enumerate(self.hands[seat]):
+            if count:
+                mask |= 1 << code
+        return mask & legal.COMPATIBLE[self._top_index()]
+
+    def legal_moves(self) -> List[Move]:
+        """Plays and draws open to the current player (wilds once per colour)."""
+        if not self.queue:
+            return []
+        seat = self.queue[0]
+        mask = self.playable_mask(seat)
+        moves: List[Move] = []
+        for code in range(NUM_CARD_TYPES):
+            if mask >> code & 1:
+                if CARD_TYPES[code][1] in WILD_CARDS:
+                    moves.extend(("play", code, color) for color in legal.COLOR_ORDER)
+                else:
+                    moves.append(("play", code, None))
+        if not (mask and self.rule("Must Play") == 1):
+            moves.append(("draw", None, None))
+        return moves
+
+    def apply(self, move: Move) -> "GameState":
+        """The state after `move`; the same state when UnoGame would reject the move."""
+        kind, number, color = move
+        if not self.queue:
+            return self
+        if kind == "play":
+            return self._play(number, color)
+        if kind == "draw":
+            return self._draw()
+        if kind == "callout":
+            return self._callout(number)
+        if kind == "uno":
+            return self._uno(number)
+        if kind == "choose_color":
+            code, current = self.top
+            if CARD_TYPES[code][1] not in WILD_CARDS:
+                return self
+            return replace(self, discard=_push(self.discard[1], (code, color)))
+        raise ValueError(f"Unknown move {move!r}")
+
+    def _deal(self, seat: int, number: int) -> "GameState":
+        deck, deck_size = self.deck, self.deck_size
+        discard, discard_size, shuffles = self.discard, self.discard_size, self.shuffles
+        if deck_size < number:
+            if discard is None:
+                raise Exception("Not enough cards found to play")
+            cards = self.deck_codes() + [code for code, _ in self.discard_cards()[:-1]]
+            random.Random(f"{self.seed}:{shuffles}").shuffle(cards)
+            shuffles += 1
+            deck, deck_size = _stack(cards), len(cards)
+            discard, discard_size = _stack([self.top]), 1
+
+        hand = list(self.hands[seat])
+        dealt = 0
+        while dealt < number and deck is not None:
+            code, deck = deck
+            hand[code] += 1
+            dealt += 1
+        return replace(
+            self,
+            deck=deck,
+            deck_size=deck_size - dealt,
+            discard=discard,
+            discard_size=discard_size,
+            shuffles=shuffles,
+            hands=_with(self.hands, seat, tuple(hand)),
+            hand_sizes=_with(self.hand_sizes, seat, self.hand_sizes[seat] + dealt),
+            called=_with(self.called, seat, False),
+            drawn=self.drawn + dealt,
+        )
+
+    def _next(self) -> "GameState":
+        queue = self.queue[1:] + self.queue[:1]
+        queue = tuple(seat for seat in queue if seat not in self.finished)
+        if not queue:
+            raise Exception("All players finished!")
+        return replace(self, queue=queue)
+
+    def _play(self, code: int, color: Optional[str]) -> "GameState":
+        seat = self.queue[0]
+        if not self.hands[seat][code] or not legal.COMPATIBLE[self._top_index()] >> code & 1:
+            return self
+        rank = CARD_TYPES[code][1]
+        wild = rank in WILD_CARDS
+        hand = _with(self.hands[seat], code, self.hands[seat][code] - 1)
+        state = replace(
+            self,
+            called_out=False,
+            discard=_push(self.discard, (code, (color or "") if wild else "")),
+            discard_size=self.discard_size + 1,
+            hands=_with(self.hands, seat, hand),
+            hand_sizes=_with(self.hand_sizes, seat, self.hand_sizes[seat] - 1),
+        )
+
+        queue = state.queue
+        if state.hand_sizes[seat] == 0:
+            state = replace(state, finished=state.finished + (seat,))
+            if len(queue) == 2:
+                return replace(state, finished=state.finished + (queue[1],), queue=())
+
+        draw_skip = state.rule("Draws Skip") == 1
+        if rank == "REVERSE":
+            if len(queue) > 2:
+                reversed_queue = queue[::-1]
+                state = replace(state, queue=reversed_queue[-1:] + reversed_queue[:-1])
+            elif state.rule("Reverses Skip") == 1:
+                state = replace(state, queue=queue[::-1])
+        elif rank == "SKIP":
+            state = replace(state, queue=queue[1:] + queue[:1])
+        elif rank in ("+2", "WILD+4"):
+            state = state._deal(queue[1], 2 if rank == "+2" else 4)
+            if draw_skip:
+                state = replace(state, queue=queue[1:] + queue[:1])
+        return state._next()
+
+    def _draw(self) -> "GameState":
+        if self.rule("Must Play") == 1 and self.playable_mask(self.queue[0]):
+            return self
+        return self._deal(self.queue[0], 1)._next()
+
+    def _callout(self, caller: int) -> "GameState":
+        if self.rule("Callouts") == 0 or self.called_out:
+            return self
+        caught = [seat for seat in self.queue if self.hand_sizes[seat] == 1 and not self.called[seat]]
+        state = self
+        for seat in caught:
+            state = state._deal(seat, self.rule("Callout Penalty"))
+        if not caught:
+            state = state._deal(caller, self.rule("False Callout Penalty"))
+        return replace(state, called_out=True)
+
+    def _uno(self, seat: int) -> "GameState":
+        if seat not in self.queue or self.hand_sizes[seat] > 2 or self.called[seat]:
+            return self
+        return replace(self, called=_with(self.called, seat, True))
+
+
+class History:
+    """Undo/redo over immutable game states.
+
+    Past and undone states are kept as persistent stacks, so fork() hands out
+    an independent history in O(1) that shares every state with this one.
+    """
+
+    def __init__(self, state: GameState, past: Stack = None, future: Stack = None):
+        self.state = state
+        self._past = past
+        self._future = future
+
+    def apply(self, move: Move) -> GameState:
+        new_state = self.state.apply(move)
+        if new_state is not self.state:
+            self._past = _push(self._past, self.state)
+            self._future = None
+            self.state = new_state
+        return self.state
+
+    def can_undo(self) -> bool:
+        return self._past is not None
+
+    def can_redo(self) -> bool:
+        return self._future is not None
+
+    def undo(self) -> GameState:
+        if self._past is None:
+            raise Exception("Nothing to undo")
+        self._future = _push(self._future, self.state)
+        self.state, self._past = self._past
+        return self.state
+
+    def redo(self) -> GameState:
+        if self._future is None:
+            raise Exception("Nothing to redo")
+        self._past = _push(self._past, self.state)
+        self.state, self._future = self._future
+        return self.state
+
+    def fork(self) -> "History":
+        return History(self.state, self._past, self._future)
@@ -0,0 +1,101 @@
+import math
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class TimerWheel:
+    """Hierarchical timing wheel keyed by arbitrary ids.
+
+    Time is cut into ticks of `tick` seconds. Level 0 has one slot per tick;
+    each higher level has slots `slots` times wider. A timer sits in the lowest
+    level whose current block contains its deadline and is moved down a level
+    when the wheel reaches its block, so arm and cancel are O(1) and advancing
+    only touches slots that are due.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, start: float = 0.0):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = int(start // tick)
+        self.wheels: List[List[Dict[Hashable, int]]] = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.overflow: Dict[Hashable, int] = {}
+        self.where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.where
+
+    def arm(self, key: Hashable, deadline: float):
+        """Schedule `key` to expire at `deadline`, replacing any earlier timer.
+
+        The deadline is rounded up to a whole tick, so a timer never fires early.
+        """
+        self.cancel(key)
+        self._place(key, max(math.ceil(deadline / self.tick), self.current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        position = self.where.pop(key, None)
+        if position is None:
+            return False
+        level, slot = position
+        if level == self.levels:
+            del self.overflow[key]
+        else:
+            del self.wheels[level][slot][key]
+        return True
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        position = self.where.get(key)
+        if position is None:
+            return None
+        level, slot = position
+        bucket = self.overflow if level == self.levels else self.wheels[level][slot]
+        return bucket[key] * self.tick
+
+    def _place(self, key: Hashable, due: int):
+        span = 1
+        for level in range(self.levels):
+            if due // (span * self.slots) == self.current // (span * self.slots):
+                slot = (due // span) % self.slots
+                self.wheels[level][slot][key] = due
+                self.where[key] = (level, slot)
+                return
+            span *= self.slots
+        self.overflow[key] = due
+        self.where[key] = (self.levels, 0)
+
+    def _cascade(self, level: int):
+        span = self.slots ** level
+        bucket = self.wheels[level][(self.current // span) % self.slots]
+        pending = list(bucket.items())
+        bucket.clear()
+        for key, due in pending:
+            del self.where[key]
+            self._place(key, due)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Move the wheel forward to `now` and return the keys that expired."""
+        target = int(now // self.tick)
+        expired = []
+        if not self.where:
+            self.current = max(self.current, target)
+            return expired
+        while self.current < target:
+            self.current += 1
+            if self.overflow and self.current % (self.slots ** self.levels) == 0:
+                pending = list(self.overflow.items())
+                self.overflow.clear()
+                for key, due in pending:
+                    del self.where[key]
+                    self._place(key, due)
+            for level in range(self.levels - 1, 0, -1):
+                if self.current % (self.slots ** level) == 0:
+                    self._cascade(level)
+            bucket = self.wheels[0][self.current % self.slots]
+            for key in bucket:
+                del self.where[key]
+                expired.append(key)
+            bucket.clear()
+        return expired
@@ -0,0 +1,197 @@
+import atexit
+import contextvars
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+# A sink is any callable taking one record, a dict such as
+#   {"type": "span", "name": "play", "trace": 3, "span": 7, "parent": None,
+#    "start": 1700000000.0, "duration_ms": 0.21, "attrs": {...}, "events": [...]}
+#   {"type": "event", "name": "reshuffle", "trace": None, "time": 1700000000.0, "attrs": {...}}
+# Events raised inside a sampled span are kept on that span's "events" list.
+Sink = Callable[[dict], None]
+
+_current = contextvars.ContextVar("uno_trace_span", default=None)
+_ids = itertools.count(1)
+
+
+class _NullSpan:
+    """Stands in for a span when tracing is off, so call sites need no checks."""
+
+    sampled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def event(self, name: str, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "sampled", "trace_id", "span_id", "parent_id",
+                 "events", "start", "_started", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: dict, parent: Optional["Span"]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        # Sampling is decided once per trace: child spans follow their root.
+        self.sampled = parent.sampled if parent is not None else tracer.sample()
+        self.span_id = next(_ids)
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.events: List[dict] = []
+        self.start = 0.0
+        self._started = 0.0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        _current.reset(self._token)
+        if self.sampled:
+            if exc_type is not None:
+                self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+            self.tracer.emit({
+                "type": "span",
+                "name": self.name,
+                "trace": self.trace_id,
+                "span": self.span_id,
+                "parent": self.parent_id,
+                "start": self.start,
+                "duration_ms": round(duration * 1000, 3),
+                "attrs": self.attrs,
+                "events": self.events,
+            })
+        return False
+
+    def set(self, **attrs):
+        if self.sampled:
+            self.attrs.update(attrs)
+
+    def event(self, name: str, **attrs):
+        if self.sampled:
+            self.events.append({"name": name, "offset_ms": round((time.perf_counter() - self._started) * 1000, 3),
+                                "attrs": attrs})
+
+
+class Tracer:
+    """Named spans and events from the engine, sampled per trace and handed to sinks.
+
+    With no sinks or a zero sample rate `enabled` is False, span() returns
+    NULL_SPAN and event() returns at once. Hot paths check `tracer.enabled`
+    first so that, while tracing is off, they don't even build attributes.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, sinks: Optional[List[Sink]] = None, seed: Optional[int] = None):
+        self.sample_rate = sample_rate
+        self.sinks: List[Sink] = list(sinks or [])
+        self.enabled = False
+        self._rng = random.Random(seed)
+        self._update()
+
+    def _update(self):
+        self.enabled = bool(self.sinks) and self.sample_rate > 0
+
+    def configure(self, sample_rate: Optional[float] = None, sinks: Optional[List[Sink]] = None):
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if sinks is not None:
+            self.sinks = list(sinks)
+        self._update()
+
+    def add_sink(self, sink: Sink):
+        self.sinks.append(sink)
+        self._update()
+
+    def remove_sink(self, sink: Sink):
+        self.sinks.remove(sink)
+        self._update()
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1 or self._rng.random() < self.sample_rate
+
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs, _current.get())
+
+    def event(self, name: str, **attrs):
+        """Record an event on the current span, or on its own (sampled) outside of any span."""
+        if not self.enabled:
+            return
+        span = _current.get()
+        if span is not None:
+            span.event(name, **attrs)
+        elif self.sample():
+            self.emit({"type": "event", "name": name, "trace": None, "time": time.time(), "attrs": attrs})
+
+    def emit(self, record: dict):
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception:
+                # A broken sink must never break a game.
+                pass
+
+
+class RingBufferSink:
+    """Keeps the last `capacity` records in memory."""
+
+    def __init__(self, capacity: int = 1000):
+        self.records = deque(maxlen=capacity)
+
+    def __call__(self, record: dict):
+        self.records.append(record)
+
+    def snapshot(self) -> List[dict]:
+        return list(self.records)
+
+    def clear(self):
+        self.records.clear()
+
+
+class JsonLinesSink:
+    """Appends each record as one JSON line to a file."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        atexit.register(self.close)
+
+    def __call__(self, record: dict):
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            self._file.write(line)
+
+    def flush(self):
+        with self.lock:
+            self._file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+# The engine's tracer; off until sinks are added (see UNO_TRACE_* settings).
+tracer = Tracer(sample_rate=0.0)
@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, List
+from  gameplay.engine.constants import CARD_TYPES, COLORS, NUM_CARD_TYPES
+
+
+class UnseenCards:
+    """Card types one player has not seen yet: in the deck or in other hands.
+
+    Starts from the full deck and is kept up to date by the game as the
+    player sees cards (their own draws and every card reaching the discard
+    pile), one O(1) update per card. A reshuffle puts the reshuffled discard
+    pile back among the unseen cards. Strategies read it to estimate what
+    opponents may hold without going through the discard pile.
+    """
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, cards: Iterable[int]):
+        self.counts: List[int] = [0] * NUM_CARD_TYPES
+        for code in cards:
+            self.counts[code] += 1
+        self.total = sum(self.counts)
+
+    def see(self, code: int):
+        self.counts[code] -= 1
+        self.total -= 1
+
+    def restore(self, codes: Iterable[int]):
+        counts = self.counts
+        for code in codes:
+            counts[code] += 1
+            self.total += 1
+
+    def probability(self, code: int) -> float:
+        """Chance that a given unseen card is of this type."""
+        return self.counts[code] / self.total if self.total else 0.0
+
+    def expected(self, code: int, hand_size: int) -> float:
+        """Expected number of cards of this type in an opponent's hand of hand_size cards."""
+        return self.probability(code) * hand_size
+
+    def color_counts(self) -> Dict[str, int]:
+        """Unseen cards of each colour (wilds excluded)."""
+        totals = {color: 0 for color in COLORS}
+        for code, count in enumerate(self.counts):
+            color = CARD_TYPES[code][0]
+            if color:
+                totals[color] += count
+        return totals
@@ -0,0 +1,292 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from gameplay.engine.game import UnoGame
+
+try:
+    import fcntl
+except ImportError:  # no file locking on Windows; records are then only safe within one process
+    fcntl = None
+
+STARTING_RATING = 1500.0
+RATING_K = 32.0
+# Ratings are ranked by whole points, clamped to this range.
+MAX_RATING = 4000
+# Names given to seats nobody named (see start_view), shared by unrelated players.
+DEFAULT_NAME = re.compile(r"Player\d*")
+
+
+class PlayerRecord:
+    __slots__ = ("name", "is_ai", "games", "wins", "rank_sum", "drawn", "rating")
+
+    def __init__(self, name: str, is_ai: bool = False):
+        self.name = name
+        self.is_ai = is_ai
+        self.games = 0
+        self.wins = 0
+        self.rank_sum = 0
+        self.drawn = 0
+        self.rating = STARTING_RATING
+
+    @property
+    def average_rank(self) -> float:
+        return self.rank_sum / self.games if self.games else 0.0
+
+    @property
+    def points(self) -> int:
+        """The rating in whole points, as ranked."""
+        return min(max(int(round(self.rating)), 0), MAX_RATING)
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "is_ai": self.is_ai,
+            "games": self.games,
+            "wins": self.wins,
+            "average_rank": round(self.average_rank, 2),
+            "drawn": self.drawn,
+            "rating": self.points,
+        }
+
+
+def game_results(game: UnoGame, now: float = None) -> dict:
+    """One finished game's result: every seat's finishing rank and cards drawn.
+
+    Players who never finished (the game ended without them) share the last rank.
+    """
+    ranks = {player.id: rank for rank, player in enumerate(game.finished, start=1)}
+    last = len(game.finished) + 1
+    return {
+        "game": game.id,
+        "finished_at": game.time_finished or (time.time() if now is None else now),
+        "players": [
+            {"name": player.username, "is_ai": player.is_ai, "rank": ranks.get(player.id, last),
+             "drawn": player.drawn}
+            for player in game.players.values()
+        ],
+    }
+
+
+def is_rated(seat: dict) -> bool:
+    """Whether a seat is one player across games: AI seats and unnamed seats are not."""
+    return not seat["is_ai"] and not DEFAULT_NAME.fullmatch(seat["name"])
+
+
+def rating_changes(ratings: List[float], ranks: List[int], k: float = RATING_K) -> List[float]:
+    """Multiplayer Elo: every pair of players is scored as one match, with ties
+    as draws, and each player's change is averaged over their opponents."""
+    n = len(ratings)
+    if n < 2:
+        return [0.0] * n
+    changes = [0.0] * n
+    for i in range(n):
+        for j in range(i + 1, n):
+            expected = 1 / (1 + 10 ** ((ratings[j] - ratings[i]) / 400))
+            score = 1.0 if ranks[i] < ranks[j] else 0.5 if ranks[i] == ranks[j] else 0.0
+            delta = k * (score - expected) / (n - 1)
+            changes[i] += delta
+            changes[j] -= delta
+    return changes
+
+
+class RatingIndex:
+    """Players ranked by rating points in a Fenwick tree of per-point counts.
+
+    Adding or removing a player and finding how many players rate above a
+    given point are O(log MAX_RATING), whatever the number of players. Players
+    on the same points share a rank and are listed by name.
+    """
+
+    def __init__(self, size: int = MAX_RATING + 1):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.buckets: Dict[int, set] = {}
+        self.total = 0
+        self._step = 1 << (size.bit_length() - 1)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def _update(self, points: int, delta: int):
+        i = points + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def _prefix(self, points: int) -> int:
+        """Players on at most `points`."""
+        i = min(points + 1, self.size)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+    def _lowest(self, k: int) -> int:
+        """Points of the k-th lowest rated player (k from 1)."""
+        i = 0
+        step = self._step
+        while step:
+            nxt = i + step
+            if nxt <= self.size and self.tree[nxt] < k:
+                i = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return i
+
+    def add(self, name: str, points: int):
+        self.buckets.setdefault(points, set()).add(name)
+        self._update(points, 1)
+
+    def remove(self, name: str, points: int):
+        bucket = self.buckets[points]
+        bucket.remove(name)
+        if not bucket:
+            del self.buckets[points]
+        self._update(points, -1)
+
+    def rank(self, points: int) -> int:
+        """Rank of a player on these points: one more than the players above them."""
+        return self.total - self._prefix(points) + 1
+
+    def top(self, k: int) -> List[str]:
+        """Names of the k best rated players, best first."""
+        names: List[str] = []
+        while len(names) < k and len(names) < self.total:
+            points = self._lowest(self.total - len(names))
+            names.extend(sorted(self.buckets[points]))
+        return names[:k]
+
+
+class Leaderboard:
+    """Ratings and totals of every player across finished games.
+
+    Each finished game is appended to a JSON lines file and folded into the
+    players' records as it is recorded, keeping a RatingIndex up to date, so
+    top() and rank() never go back over past games. Loading replays the file
+    once; after that, games other processes append are read in before each
+    lookup, and record() appends under a file lock and reads its own game
+    back, so every process folds the games in the same order.
+
+    Players are identified by name. AI seats and unnamed seats play at the
+    starting rating but are not recorded, as their names are shared by
+    unrelated players.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path) if path else None
+        self.lock = threading.RLock()
+        self._reset()
+        self._refresh()
+
+    def _reset(self):
+        self.players: Dict[str, PlayerRecord] = {}
+        self.index = RatingIndex()
+        self.games = 0
+        # How far into the file has been folded in.
+        self.offset = 0
+
+    def _refresh(self):
+        """Fold in the games appended to the file since it was last read."""
+        if not self.path:
+            return
+        with self.lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            if size == self.offset:
+                return
+            if size < self.offset:  # the file was replaced
+                self._reset()
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            # A line still being written is read once it is complete.
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+            self.offset += end
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def record_game(self, game: UnoGame):
+        self.record(game_results(game))
+
+    def record(self, results: dict):
+        with self.lock:
+            if not self.path:
+                self._apply(results)
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.write(json.dumps(results) + "\n")
+                finally:
+                    f.flush()
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._refresh()
+
+    def _apply(self, results: dict):
+        seats = []
+        for seat in results["players"]:
+            # A name taken by two seats counts once, for the first of them.
+            if not is_rated(seat) or all(seat["name"] != other["name"] for other in seats):
+                seats.append(seat)
+        records = []
+        for seat in seats:
+            if not is_rated(seat):
+                records.append(None)
+                continue
+            record = self.players.get(seat["name"])
+            if record is None:
+                record = self.players[seat["name"]] = PlayerRecord(seat["name"], seat["is_ai"])
+            else:
+                self.index.remove(record.name, record.points)
+            records.append(record)
+
+        ranks = [seat["rank"] for seat in seats]
+        changes = rating_changes([record.rating if record else STARTING_RATING for record in records], ranks)
+        for record, seat, change in zip(records, seats, changes):
+            if record is None:
+                continue
+            record.games += 1
+            record.wins += seat["rank"] == 1
+            record.rank_sum += seat["rank"]
+            record.drawn += seat["drawn"]
+            record.rating += change
+            self.index.add(record.name, record.points)
+        self.games += 1
+
+    def get(self, name: str) -> Optional[PlayerRecord]:
+        self._refresh()
+        return self.players.get(name)
+
+    def rank(self, name: str) -> Optional[int]:
+        with self.lock:
+            self._refresh()
+            record = self.players.get(name)
+            return self.index.rank(record.points) if record else None
+
+    def top(self, k: int = 10) -> List[Tuple[int, PlayerRecord]]:
+        """(rank, record) of the k best rated players."""
+        with self.lock:
+            self._refresh()
+            return self.ranked(self.index.top(k))
+
+    def ranked(self, names: Iterable[str]) -> List[Tuple[int, PlayerRecord]]:
+        """(rank, record) of each known name."""
+        with self.lock:
+            self._refresh()
+            return [(self.index.rank(self.players[name].points), self.players[name])
+                    for name in names if name in self.players]
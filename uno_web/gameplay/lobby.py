@@ -0,0 +1,211 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from gameplay.engine.game import UnoGame
+
+# Rule overrides for each preset players can queue for.
+PRESETS: Dict[str, Dict[str, int]] = {
+    "classic": {},
+    "quick": {"Initial Cards": 5},
+    "strict": {"Must Play": 1, "Callout Penalty": 4, "False Callout Penalty": 4},
+    "marathon": {"Decks": 2, "Initial Cards": 15},
+}
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+
+
+@dataclass
+class Ticket:
+    id: int
+    name: str
+    players: int
+    preset: str
+    ai_fill: bool
+    joined: float
+    # Last time the player was seen waiting (see Matchmaker.waiting()).
+    seen: float = 0.0
+
+
+@dataclass
+class Match:
+    preset: str
+    players: int
+    tickets: List[Ticket]
+
+    @property
+    def ai_seats(self) -> int:
+        return self.players - len(self.tickets)
+
+
+@dataclass
+class _Bucket:
+    # Waiting tickets of one (players, preset) pair in join order, split by
+    # whether they accept AI seats so both kinds of match take O(seats).
+    ai_ok: "OrderedDict[int, Ticket]" = field(default_factory=OrderedDict)
+    humans_only: "OrderedDict[int, Ticket]" = field(default_factory=OrderedDict)
+
+    def __len__(self) -> int:
+        return len(self.ai_ok) + len(self.humans_only)
+
+    def add(self, ticket: Ticket):
+        (self.ai_ok if ticket.ai_fill else self.humans_only)[ticket.id] = ticket
+
+    def remove(self, ticket: Ticket):
+        (self.ai_ok if ticket.ai_fill else self.humans_only).pop(ticket.id, None)
+
+    def take_oldest(self, count: int) -> List[Ticket]:
+        taken = []
+        while len(taken) < count and self:
+            first_ai = next(iter(self.ai_ok.values()), None)
+            first_human = next(iter(self.humans_only.values()), None)
+            if first_human is None or (first_ai is not None and first_ai.joined <= first_human.joined):
+                taken.append(self.ai_ok.popitem(last=False)[1])
+            else:
+                taken.append(self.humans_only.popitem(last=False)[1])
+        return taken
+
+    def take_ai_ok(self, count: int) -> List[Ticket]:
+        return [self.ai_ok.popitem(last=False)[1] for _ in range(min(count, len(self.ai_ok)))]
+
+
+class Matchmaker:
+    """Groups waiting players into games.
+
+    Tickets wait in buckets keyed by (player count, preset), so joining,
+    leaving and forming a full table never look at other buckets or at other
+    tickets than the ones being seated. Tickets that accept AI seats also wait
+    in a join-ordered queue; once the oldest has waited `ai_wait` seconds its
+    table is filled with whoever else in its bucket accepts AI, plus AI seats.
+
+    Checking on a ticket with waiting() is its heartbeat: tick() drops
+    tickets not checked on for `ttl` seconds (the player closed the page),
+    and seats nobody picked up within `ttl` seconds of their game starting.
+
+    All of this lives in the memory of one process, so players are only
+    matched with players whose lobby requests reach the same process: serve
+    the lobby from a single worker process.
+    """
+
+    def __init__(self, ai_wait: float = 30.0, ttl: float = 20.0):
+        self.ai_wait = ai_wait
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.buckets: Dict[Tuple[int, str], _Bucket] = {}
+        self.tickets: Dict[int, Ticket] = {}
+        # Where each seated ticket's game is, with when it was assigned, until
+        # its player picks it up; in order of assignment.
+        self.assigned: "OrderedDict[int, Tuple[float, object]]" = OrderedDict()
+        # Waiting tickets, least recently seen first.
+        self._seen: "OrderedDict[int, Ticket]" = OrderedDict()
+        self._ai_queue: Deque[Ticket] = deque()
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self.tickets)
+
+    def join(self, name: str, players: int, preset: str = "classic", ai_fill: bool = True,
+             now: float = None) -> Tuple[Ticket, List[Match]]:
+        """Queue a player; returns their ticket and any table their joining completed."""
+        if preset not in PRESETS:
+            raise ValueError(f"Unknown preset '{preset}'")
+        players = max(MIN_PLAYERS, min(MAX_PLAYERS, players))
+        now = time.time() if now is None else now
+        ticket = Ticket(next(self._ids), name, players, preset, ai_fill, now, now)
+        with self.lock:
+            self.tickets[ticket.id] = ticket
+            self._seen[ticket.id] = ticket
+            bucket = self.buckets.setdefault((players, preset), _Bucket())
+            bucket.add(ticket)
+            if ai_fill:
+                self._ai_queue.append(ticket)
+            if len(bucket) < players:
+                return ticket, []
+            return ticket, [self._seat(bucket.take_oldest(players), players, preset)]
+
+    def leave(self, ticket_id: int) -> bool:
+        with self.lock:
+            return self._drop(ticket_id)
+
+    def _drop(self, ticket_id: int) -> bool:
+        ticket = self.tickets.pop(ticket_id, None)
+        if ticket is None:
+            return False
+        self._seen.pop(ticket_id, None)
+        self.buckets[(ticket.players, ticket.preset)].remove(ticket)
+        return True
+
+    def waiting(self, ticket_id: int, now: float = None) -> Optional[Tuple[Ticket, int]]:
+        """The ticket and how many players are waiting in its bucket, if it still waits."""
+        with self.lock:
+            ticket = self.tickets.get(ticket_id)
+            if ticket is None:
+                return None
+            ticket.seen = time.time() if now is None else now
+            self._seen.move_to_end(ticket_id)
+            return ticket, len(self.buckets[(ticket.players, ticket.preset)])
+
+    def assign(self, ticket_id: int, seat, now: float = None):
+        with self.lock:
+            self.assigned[ticket_id] = (time.time() if now is None else now, seat)
+
+    def claim(self, ticket_id: int):
+        with self.lock:
+            entry = self.assigned.pop(ticket_id, None)
+            return entry[1] if entry is not None else None
+
+    def tick(self, now: float = None) -> List[Match]:
+        """Drop abandoned tickets and seats, and fill tables with AI for
+        tickets that have waited long enough."""
+        now = time.time() if now is None else now
+        matches = []
+        with self.lock:
+            while self._seen:
+                ticket = next(iter(self._seen.values()))
+                if ticket.seen + self.ttl > now:
+                    break
+                self._drop(ticket.id)
+            while self.assigned:
+                ticket_id, (assigned_at, _) = next(iter(self.assigned.items()))
+                if assigned_at + self.ttl > now:
+                    break
+                del self.assigned[ticket_id]
+            while self._ai_queue and self._ai_queue[0].joined + self.ai_wait <= now:
+                ticket = self._ai_queue.popleft()
+                if ticket.id not in self.tickets:
+                    continue
+                bucket = self.buckets[(ticket.players, ticket.preset)]
+                bucket.remove(ticket)
+                others = bucket.take_ai_ok(ticket.players - 1)
+                matches.append(self._seat([ticket] + others, ticket.players, ticket.preset))
+        return matches
+
+    def _seat(self, tickets: List[Ticket], players: int, preset: str) -> Match:
+        for ticket in tickets:
+            self.tickets.pop(ticket.id, None)
+            self._seen.pop(ticket.id, None)
+        return Match(preset, players, tickets)
+
+
+def create_games(matches: List[Match], turn_timeout: int = 0) -> List[UnoGame]:
+    """Build and start one game per match; a ticket's seat is its index in the match."""
+    games = []
+    for match in matches:
+        game = UnoGame()
+        for name, value in PRESETS[match.preset].items():
+            game.get_rule(name).value = value
+        game.get_rule("Turn Timeout").value = turn_timeout
+        for ticket in match.tickets:
+            game.add_player(ticket.name, is_ai=False)
+        for i in range(match.ai_seats):
+            game.add_player(f"AI-{i+1}", is_ai=True)
+        game.start()
+        games.append(game)
+    return games
+
+
+matchmaker = Matchmaker()
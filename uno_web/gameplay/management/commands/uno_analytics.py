@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay.analytics import AGGREGATES, GameStore
+
+
+class Command(BaseCommand):
+    help = "Grouped aggregates over finished games in the analytics store."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--by", action="append", default=[], help="Column to group by (repeatable).")
+        parser.add_argument("--value", default="won", help="Column to aggregate, or 'won'.")
+        parser.add_argument("--agg", default="mean", choices=sorted(AGGREGATES))
+        parser.add_argument("--where", action="append", default=[], metavar="COLUMN=VALUE",
+                            help="Only include rows where the column equals the value.")
+        parser.add_argument("--path", default=None, help="Store directory (default: UNO_ANALYTICS_DIR).")
+
+    def handle(self, *args, **options):
+        path = options["path"] or getattr(settings, "UNO_ANALYTICS_DIR", None)
+        if not path:
+            raise CommandError("No analytics store configured")
+        store = GameStore(path)
+
+        where = {}
+        for item in options["where"]:
+            column, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Expected COLUMN=VALUE, got '{item}'")
+            where[column] = float(value)
+
+        keys = options["by"] or ["seat"]
+        for name in keys + list(where) + ([options["value"]] if options["value"] != "won" else []):
+            if name not in store.schema:
+                raise CommandError(f"Unknown column '{name}'. Columns: {', '.join(store.schema)}")
+
+        started = time.perf_counter()
+        result = store.group_by(keys, options["value"], options["agg"], where)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{' '.join(f'{k:>12}' for k in keys)}{options['agg'] + '(' + options['value'] + ')':>20}")
+        for key, value in result.items():
+            self.stdout.write(f"{' '.join(f'{k:>12}' for k in key)}{value:>20.4f}")
+        self.stdout.write(f"{len(store)} rows scanned in {elapsed:.3f}s")
@@ -0,0 +1,180 @@
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from gameplay.engine.constants import COLORS
+from gameplay.views import GAMES_KEY, SESSION_KEY, _decode_game
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    idx = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[idx]
+
+
+class LoadStats:
+    """Thread-safe latency samples grouped by action name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.games_finished = 0
+
+    def record(self, action: str, elapsed: float, ok: bool = True):
+        with self.lock:
+            self.samples.setdefault(action, []).append(elapsed)
+            if not ok:
+                self.errors[action] = self.errors.get(action, 0) + 1
+
+    def finish_game(self):
+        with self.lock:
+            self.games_finished += 1
+
+    def total_requests(self) -> int:
+        return sum(len(v) for v in self.samples.values())
+
+
+class SimulatedPlayer:
+    """Drives one browser session through the start/reveal/play/draw/uno flow."""
+
+    def __init__(self, stats: LoadStats, ai_count: int, turns: int, think: tuple, rng: random.Random):
+        self.client = Client(SERVER_NAME="localhost")
+        self.stats = stats
+        self.ai_count = ai_count
+        self.turns = turns
+        self.think = think
+        self.rng = rng
+
+    def request(self, action: str, method: str, url: str, data=None):
+        start = time.perf_counter()
+        try:
+            if method == "post":
+                response = self.client.post(url, data or {})
+            else:
+                response = self.client.get(url)
+            ok = response.status_code < 400
+        except Exception:
+            response = None
+            ok = False
+        self.stats.record(action, time.perf_counter() - start, ok)
+        return response
+
+    def pause(self):
+        low, high = self.think
+        if high > 0:
+            time.sleep(self.rng.uniform(low, high))
+
+    def current_game(self):
+        entry = next(iter(self.client.session.get(GAMES_KEY, {}).values()), None)
+        if entry is None:
+            return None
+        val = import_module(settings.SESSION_ENGINE).SessionStore(entry["session"]).get(SESSION_KEY)
+        return _decode_game(val) if val else None
+
+    def run(self):
+        start_url = reverse("uno_start")
+
+        self.request("start_page", "get", start_url)
+        self.pause()
+        response = self.request("start", "post", start_url, {
+            "human_count": "1",
+            "human_name_1": "LoadPlayer",
+            "ai_count": str(self.ai_count),
+        })
+        if response is None or response.status_code != 302:
+            return
+        game_url = response["Location"]
+
+        for _ in range(self.turns):
+            self.pause()
+            self.request("view", "get", game_url)
+            try:
+                game = self.current_game()
+            except Exception:
+                self.stats.record("session_read", 0.0, ok=False)
+                continue
+            if not game or not game.queue:
+                self.stats.finish_game()
+                break
+
+            self.request("reveal", "post", game_url, {"action": "start_turn"})
+            self.pause()
+
+            player = game.get_curr_player()
+            play_cmd, wild_color = player.select_card_to_play(game)
+
+            if len(player.hand) == 2 and not player.called:
+                self.request("uno", "post", game_url, {"action": "uno"})
+
+            if play_cmd.startswith("play"):
+                card_input = play_cmd[5:]
+                self.request("play", "post", game_url, {"action": "play", "card_input": card_input})
+                if wild_color:
+                    self.request("play_wild", "post", game_url, {
+                        "action": "select_wild_color",
+                        "wild_color": COLORS.get(wild_color, "Red").lower(),
+                    })
+            else:
+                self.request("draw", "post", game_url, {"action": "draw"})
+
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Drive simulated players against the game views and report throughput and latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=200, help="Number of simulated players (one game each).")
+        parser.add_argument("--concurrency", type=int, default=16, help="Number of players running at once.")
+        parser.add_argument("--turns", type=int, default=30, help="Maximum turns each player takes.")
+        parser.add_argument("--ai", type=int, default=1, help="AI opponents per game.")
+        parser.add_argument("--think-min", type=float, default=0.05, help="Minimum think time in seconds.")
+        parser.add_argument("--think-max", type=float, default=0.3, help="Maximum think time in seconds.")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for think times.")
+
+    def handle(self, *args, **options):
+        stats = LoadStats()
+        seeder = random.Random(options["seed"])
+        think = (options["think_min"], options["think_max"])
+        players = [
+            SimulatedPlayer(stats, options["ai"], options["turns"], think, random.Random(seeder.random()))
+            for _ in range(options["players"])
+        ]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            for future in [pool.submit(player.run) for player in players]:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        self.report(stats, elapsed)
+
+    def report(self, stats: LoadStats, elapsed: float):
+        total = stats.total_requests()
+        self.stdout.write(f"{total} requests in {elapsed:.2f}s "
+                          f"({total / elapsed if elapsed else 0:.1f} req/s), "
+                          f"{stats.games_finished} games finished")
+        self.stdout.write(f"{'action':<12}{'count':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for action, samples in stats.samples.items():
+            values = sorted(samples)
+            self.stdout.write(
+                f"{action:<12}{len(values):>8}{stats.errors.get(action, 0):>8}"
+                f"{len(values) / elapsed if elapsed else 0:>9.1f}"
+                f"{percentile(values, 50) * 1000:>9.2f}"
+                f"{percentile(values, 95) * 1000:>9.2f}"
+                f"{percentile(values, 99) * 1000:>9.2f}"
+                f"{values[-1] * 1000:>9.2f}"
+            )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay.engine import memory
+
+
+class Command(BaseCommand):
+    help = "Measure the memory footprint and session payload of a game, optionally with a long growth test."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=4, help="Number of (AI) players in the game.")
+        parser.add_argument("--rule", action="append", default=[], metavar="NAME=VALUE",
+                            help="Override a rule, e.g. --rule decks=8 --rule 'initial cards=50'.")
+        parser.add_argument("--turns", type=int, default=0, help="Turns to play before measuring.")
+        parser.add_argument("--growth-turns", type=int, default=0, help="Run a growth test over this many turns.")
+        parser.add_argument("--sample-every", type=int, default=500, help="Turns between growth samples.")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        overrides = {}
+        for item in options["rule"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Expected NAME=VALUE, got '{item}'")
+            overrides[name.strip()] = int(value)
+
+        try:
+            game = memory.new_game(options["players"], overrides, options["seed"])
+        except Exception as e:
+            raise CommandError(f"Could not create game: {e}")
+
+        for _ in range(options["turns"]):
+            if not game.queue:
+                break
+            memory.play_turn(game)
+
+        for line in memory.format_report(memory.footprint(game)):
+            self.stdout.write(line)
+
+        if options["growth_turns"]:
+            result = memory.growth_test(options["growth_turns"], options["players"], overrides,
+                                        options["sample_every"])
+            self.stdout.write("")
+            self.stdout.write(f"{'turn':>8}{'game bytes':>12}{'discard':>9}{'deck':>7}{'hand cards':>12}{'traced':>12}")
+            for sample in result["samples"]:
+                self.stdout.write(f"{sample['turn']:>8}{sample['game_bytes']:>12}{sample['discard']:>9}"
+                                  f"{sample['deck']:>7}{sample['hand_cards']:>12}{sample['traced']:>12}")
+            self.stdout.write(f"{result['games']} games played, largest discard pile {result['max_discard']} cards, "
+                              f"traced memory at game start grew by {result['baseline_growth']} bytes")
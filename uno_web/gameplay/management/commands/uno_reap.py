@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gameplay.reaper import GameReaper
+from gameplay.views import GAME_ID_KEY, SESSION_KEY, reap_session_game
+
+
+class Command(BaseCommand):
+    help = "Archive and delete games idle for longer than UNO_GAME_IDLE_TIMEOUT, found by scanning the session table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--idle", type=int, default=None, help="Idle seconds (default: UNO_GAME_IDLE_TIMEOUT).")
+        parser.add_argument("--batch", type=int, default=None, help="Games per sweep (default: UNO_REAPER_BATCH).")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to wait between sweeps.")
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in ("django.contrib.sessions.backends.db",
+                                           "django.contrib.sessions.backends.cached_db"):
+            raise CommandError("Only database-backed sessions can be scanned")
+        idle = options["idle"] if options["idle"] is not None else getattr(settings, "UNO_GAME_IDLE_TIMEOUT", 0)
+        if not idle:
+            raise CommandError("No idle timeout configured")
+
+        # The server's reaper only knows games touched since it started, so
+        # rebuild the index from the sessions: a session's last save is its
+        # expiry date minus the session lifetime.
+        reaper = GameReaper(idle, options["batch"] or getattr(settings, "UNO_REAPER_BATCH", 50))
+        reaper.on_evict = reap_session_game
+        now = time.time()
+        scanned = games = 0
+        for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=500):
+            scanned += 1
+            data = session.get_decoded()
+            if data.get(SESSION_KEY) and data.get(GAME_ID_KEY):
+                games += 1
+                last_active = session.expire_date.timestamp() - settings.SESSION_COOKIE_AGE
+                reaper.track(data[GAME_ID_KEY], session.session_key, last_active)
+        self.stdout.write(f"Scanned {scanned} sessions, {games} hold games, {len(reaper.backlog)} idle")
+
+        # Move whatever the wheel has expired into the backlog, evicting nothing yet.
+        reaper.sweep(now, batch=0)
+        while reaper.backlog:
+            reaper.sweep(now)
+            if options["pause"]:
+                time.sleep(options["pause"])
+        metrics = reaper.metrics()
+        self.stdout.write(f"Evicted {metrics['evicted']} idle games ({metrics['failed']} failed), "
+                          f"reclaimed {metrics['reclaimed_bytes']} bytes in {metrics['sweeps']} sweeps")
@@ -0,0 +1,44 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay.engine.replay import ReplayArchive, replay
+
+
+class Command(BaseCommand):
+    help = "Summarize the replay archive of finished (or abandoned) games, or replay one of them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=None, help="Archive file (default: UNO_REPLAY_ARCHIVE).")
+        parser.add_argument("--abandoned", action="store_true",
+                            help="Read the archive of games evicted unfinished (UNO_ABANDONED_ARCHIVE).")
+        parser.add_argument("--game", type=int, default=None, help="Replay the game with this index.")
+        parser.add_argument("--moves", type=int, default=None, help="Stop the replay after this many moves.")
+
+    def handle(self, *args, **options):
+        setting = "UNO_ABANDONED_ARCHIVE" if options["abandoned"] else "UNO_REPLAY_ARCHIVE"
+        path = options["path"] or getattr(settings, setting, None)
+        if not path:
+            raise CommandError("No replay archive configured")
+        archive = ReplayArchive(path)
+
+        if options["game"] is None:
+            started = time.perf_counter()
+            games = moves = 0
+            for record in archive.mapped():
+                games += 1
+                moves += sum(1 for _ in record.iter_moves())
+            elapsed = time.perf_counter() - started
+            size = os.path.getsize(archive.path) if os.path.exists(archive.path) else 0
+            self.stdout.write(f"{games} games, {moves} moves, {size} bytes "
+                              f"({size / games if games else 0:.0f} bytes per game), scanned in {elapsed:.3f}s")
+            return
+
+        record = next((r for i, r in enumerate(archive.mapped()) if i == options["game"]), None)
+        if record is None:
+            raise CommandError(f"No game {options['game']} in {archive.path}")
+        game = replay(record, options["moves"])
+        self.stdout.write(f"Seed {record.seed}, seats: {', '.join(name for name, _ in record.seats)}")
+        self.stdout.write(game.table() if game.queue else game.scoreboard())
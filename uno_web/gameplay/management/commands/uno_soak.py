@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay.engine import soak
+
+
+class Command(BaseCommand):
+    help = "Run long and adversarial games, tracking per-turn latency and memory, and flag superlinear drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=sorted(soak.SCENARIOS), default=[],
+                            help="Scenario to run (repeatable); all of them by default.")
+        parser.add_argument("--turns", type=int, default=20000, help="Turns to play per scenario.")
+        parser.add_argument("--window", type=int, default=1000, help="Turns per latency/memory sample.")
+        parser.add_argument("--players", type=int, default=4)
+        parser.add_argument("--rule", action="append", default=[], metavar="NAME=VALUE",
+                            help="Override a rule on top of the scenario's own.")
+        parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster, latency only).")
+        parser.add_argument("--latency-limit", type=float, default=0.25,
+                            help="Largest acceptable growth exponent of per-turn latency.")
+        parser.add_argument("--fail-on-drift", action="store_true", help="Exit with an error if drift is flagged.")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        overrides = {}
+        for item in options["rule"]:
+            name, sep, value = item.partition("=")
+            if not sep:
+                raise CommandError(f"Expected NAME=VALUE, got '{item}'")
+            overrides[name.strip()] = int(value)
+
+        flagged = []
+        for name in options["scenario"] or list(soak.SCENARIOS):
+            scenario = soak.SCENARIOS[name]
+            self.stdout.write(f"{name}: {scenario.description}")
+            try:
+                result = soak.soak(scenario, options["turns"], options["players"], options["window"],
+                                   options["seed"], not options["no_memory"], overrides,
+                                   options["latency_limit"])
+            except Exception as e:
+                raise CommandError(f"Scenario '{name}' failed: {e}")
+
+            for line in soak.format_result(result):
+                self.stdout.write(line)
+            self.stdout.write("")
+            if result.flags:
+                flagged.append(name)
+
+        if flagged and options["fail_on_drift"]:
+            raise CommandError(f"Drift flagged in: {', '.join(flagged)}")
@@ -0,0 +1,46 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+
+from gameplay import timing
+
+logger = logging.getLogger("gameplay.timing")
+_sampler = random.Random()
+
+
+class ServerTimingMiddleware:
+    """Report where each request spent its time.
+
+    Adds a Server-Timing header with the phases recorded through
+    gameplay.timing (session load, engine action, AI turns, session save,
+    context building, template render) and logs a sampled share of requests
+    as one JSON line each. Listed first so the total covers the session
+    middleware as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = timing.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.end()
+
+        total = timings.total()
+        response["Server-Timing"] = timings.header(total)
+
+        rate = getattr(settings, "UNO_TIMING_SAMPLE_RATE", 0)
+        if rate and _sampler.random() < rate:
+            logger.info(json.dumps({
+                "method": request.method,
+                "path": request.path,
+                "action": request.POST.get("action") if request.method == "POST" else None,
+                "status": response.status_code,
+                "total_ms": round(total * 1000, 3),
+                "phases": timings.as_dict(),
+            }))
+        return response
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from gameplay.engine.timers import TimerWheel
+
+logger = logging.getLogger("gameplay.reaper")
+
+
+class GameReaper:
+    """Evicts games nobody has looked at for `idle` seconds.
+
+    Every request on a game touches it here, re-arming its idle deadline in
+    a timing wheel, so touching costs O(1) and finding the idle games only
+    looks at the wheel slots that came due. Idle games queue up in a backlog
+    and each sweep hands at most `batch` of them to
+    `on_evict(game_id, session_key)`, which archives the game, deletes its
+    session and returns the bytes reclaimed. A background thread sweeps every
+    `interval` seconds, so a burst of idle games is cleared over several
+    sweeps instead of holding up requests.
+    """
+
+    def __init__(self, idle: float = 0, batch: int = 50, interval: float = 5.0, tick: float = 1.0):
+        self.idle = idle
+        self.batch = batch
+        self.interval = interval
+        self.wheel = TimerWheel(tick=tick, start=time.time())
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, str] = {}
+        self.backlog: Deque[Tuple[str, str]] = deque()
+        self.on_evict: Optional[Callable[[str, str], int]] = None
+        self.evicted = 0
+        self.failed = 0
+        self.reclaimed_bytes = 0
+        self.sweeps = 0
+        self.last_sweep_seconds = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def touch(self, game_id: str, session_key: Optional[str]):
+        """Record activity on a game stored in the given session."""
+        if self.track(game_id, session_key, time.time()):
+            self._ensure_running()
+
+    def track(self, game_id: str, session_key: Optional[str], last_active: float) -> bool:
+        """Index a game as last active at the given time, without starting the sweeping thread."""
+        if not self.idle or not session_key:
+            return False
+        deadline = last_active + self.idle
+        with self.lock:
+            if deadline <= time.time():
+                # Already idle: the wheel would only expire it on its next tick.
+                self.wheel.cancel(game_id)
+                self.sessions.pop(game_id, None)
+                self.backlog.append((game_id, session_key))
+            else:
+                self.sessions[game_id] = session_key
+                self.wheel.arm(game_id, deadline)
+        return True
+
+    def forget(self, game_id: str):
+        with self.lock:
+            self.wheel.cancel(game_id)
+            self.sessions.pop(game_id, None)
+
+    def sweep(self, now: float = None, batch: int = None) -> int:
+        """Evict up to `batch` idle games; returns how many were evicted.
+
+        A batch of 0 only moves games that went idle into the backlog.
+        """
+        limit = self.batch if batch is None else batch
+        started = time.perf_counter()
+        with self.lock:
+            for game_id in self.wheel.advance(time.time() if now is None else now):
+                session_key = self.sessions.pop(game_id, None)
+                if session_key:
+                    self.backlog.append((game_id, session_key))
+            due = []
+            while self.backlog and len(due) < limit:
+                game_id, session_key = self.backlog.popleft()
+                # Touched again while waiting in the backlog.
+                if game_id not in self.wheel:
+                    due.append((game_id, session_key))
+
+        evicted = 0
+        for game_id, session_key in due:
+            try:
+                reclaimed = self.on_evict(game_id, session_key) if self.on_evict else 0
+            except Exception as e:
+                self.failed += 1
+                logger.exception("Error evicting game %s: %s", game_id, e)
+                continue
+            if reclaimed is None:
+                continue
+            evicted += 1
+            self.reclaimed_bytes += reclaimed
+
+        self.evicted += evicted
+        self.sweeps += 1
+        self.last_sweep_seconds = time.perf_counter() - started
+        if evicted:
+            logger.info("Evicted %d idle games in %.3fs, %d waiting", evicted, self.last_sweep_seconds,
+                        len(self.backlog))
+        return evicted
+
+    def metrics(self) -> dict:
+        return {
+            "tracked": len(self.sessions),
+            "backlog": len(self.backlog),
+            "evicted": self.evicted,
+            "failed": self.failed,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "sweeps": self.sweeps,
+            "last_sweep_ms": round(self.last_sweep_seconds * 1000, 3),
+        }
+
+    def _ensure_running(self):
+        if self._thread is not None:
+            return
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="uno-game-reaper", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.exception("Error reaping games: %s", e)
+
+
+game_reaper = GameReaper()
@@ -1,3 +1,623 @@
-from django.test import TestCase
+import asyncio
+import math
+import os
+import pickle
+import random
+import tempfile
+import time
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+from gameplay import analytics, deltas, views
+from gameplay.leaderboard import Leaderboard, RatingIndex
+from gameplay.lobby import Matchmaker
+from gameplay.reaper import GameReaper
+from gameplay.turns import turn_scheduler
+from gameplay.concurrency import GameLocks, StaleGameError
+from gameplay.engine import env, memory, soak
+from gameplay.engine.card import CARD_PROTOTYPES, Card
+from gameplay.engine.constants import CARD_CODES, CARD_TYPES
+from gameplay.engine.game import UnoGame
+from gameplay.engine.moves import iter_moves
+from gameplay.engine.replay import ReplayArchive, replay
+from gameplay.engine.state import GameState
+from gameplay.engine.timers import TimerWheel
+
+
+def _new_game(players=2, seed=1) -> UnoGame:
+    game = UnoGame(seed=seed)
+    for i in range(players):
+        game.add_player(f"AI-{i + 1}", True)
+    game.start()
+    return game
+
+
+def _take_turn(game: UnoGame):
+    player = game.get_curr_player()
+    command, color = player.select_card_to_play(game)
+    if command.startswith("play"):
+        game.play(command[5:], color)
+        if len(player.hand) == 1 and not player.called:
+            game.uno(player.id)
+    else:
+        game.draw()
+
+
+def _play_out(game: UnoGame, limit=5000) -> UnoGame:
+    for _ in range(limit):
+        if not game.queue:
+            break
+        _take_turn(game)
+    return game
+
+
+def _stored_session(session_key):
+    return import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+
+
+@override_settings(UNO_ANALYTICS_DIR=None, UNO_REPLAY_ARCHIVE=None, UNO_ABANDONED_ARCHIVE=None, UNO_LEADERBOARD_FILE=None,
+                   UNO_TURN_TIMEOUT=0, UNO_GAME_IDLE_TIMEOUT=0, UNO_TIMING_SAMPLE_RATE=0)
+class GameSessionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        response = self.client.post("/", {"human_count": "1", "human_name_1": "Me", "ai_count": "1"})
+        self.url = response["Location"]
+        self.game_id = self.url.rstrip("/").rsplit("/", 1)[-1]
+        self.session_key = self.client.session[views.GAMES_KEY][self.game_id]["session"]
+
+    def _load(self):
+        holder = SimpleNamespace(session=_stored_session(self.session_key))
+        return holder, views._load_game_from_session(holder)
+
+    def test_commit_refuses_to_overwrite_a_newer_save(self):
+        holder, game = self._load()
+        other, other_game = self._load()
+        other_game.draw()
+        views._save_game_to_session(other, other_game)
+        views._commit_game_session(other)
+
+        game.draw()
+        views._save_game_to_session(holder, game)
+        with self.assertRaises(StaleGameError):
+            views._commit_game_session(holder)
+        self.assertEqual(_stored_session(self.session_key)[views.GAME_VERSION_KEY], other_game.version)
+
+    def test_cached_fragments_get_this_requests_token_and_version(self):
+        self.client.post(self.url, {"action": "start_turn"})
+        fragments = self.client.get(self.url + "fragments/").json()
+        hand = fragments["fragments"]["hand"]["html"]
+        self.assertIn('name="csrfmiddlewaretoken"', hand)
+        self.assertIn(f'name="version" value="{fragments["version"]}"', hand)
+        self.assertNotIn(views.CSRF_PLACEHOLDER, hand)
+        cached = views.cache.get(views.FRAGMENT_CACHE_KEY.format(
+            game_id=self.game_id, seat=None, name="hand", key=fragments["fragments"]["hand"]["key"]))
+        self.assertIn(views.CSRF_PLACEHOLDER, cached)
+        self.assertIn(views.VERSION_PLACEHOLDER, cached)
+
+    def _set_seat(self, seat):
+        session = self.client.session
+        session[views.GAMES_KEY][self.game_id]["seat"] = seat
+        session.save()
+
+    def test_state_shows_a_seated_player_only_their_own_hand(self):
+        holder, game = self._load()
+        current = game.get_curr_player().id
+        self.assertIsNone(self.client.get(self.url + "state/").json()["hand"])
+        self._set_seat(current)
+        self.assertEqual(self.client.get(self.url + "state/").json()["viewer"], current)
+        self._set_seat(1 - current)
+        self.assertIsNone(self.client.get(self.url + "state/").json()["hand"])
+
+    def test_early_timer_waits_for_the_deadline_again(self):
+        holder, game = self._load()
+        game.turn_deadline = time.time() + 100
+        views._save_game_to_session(holder, game)
+        views._commit_game_session(holder)
+        turn_scheduler.cancel(self.game_id)
+        views.expire_session_turn(self.game_id, self.session_key)
+        self.assertGreaterEqual(turn_scheduler.wheel.deadline(self.game_id), game.turn_deadline)
+        self.assertEqual(self._load()[1].version, game.version)
+        turn_scheduler.cancel(self.game_id)
+
+    def test_state_sends_changes_since_a_served_version(self):
+        served = self.client.get(self.url + "state/").json()
+        self.assertTrue(served["full"])
+        self.client.post(self.url, {"action": "draw", "version": served["version"]})
+        update = self.client.get(self.url + f"state/?since={served['version']}").json()
+        self.assertNotIn("full", update)
+        self.assertEqual(update["base"], served["version"])
+        self.assertGreater(update["version"], served["version"])
+        # A version never served here cannot be diffed against.
+        self.assertTrue(self.client.get(self.url + f"state/?since={served['version'] + 1}").json()["full"])
+
+    def test_reaped_unfinished_games_are_archived_apart(self):
+        directory = tempfile.mkdtemp()
+        finished, abandoned = os.path.join(directory, "games.unor"), os.path.join(directory, "abandoned.unor")
+        with self.settings(UNO_REPLAY_ARCHIVE=finished, UNO_ABANDONED_ARCHIVE=abandoned):
+            self.assertGreater(views.reap_session_game(self.game_id, self.session_key), 0)
+        self.assertFalse(os.path.exists(finished))
+        (record,) = ReplayArchive(abandoned).records()
+        self.assertEqual([name for name, _ in record.seats], ["Me", "AI-1"])
+        self.assertIsNone(views.reap_session_game(self.game_id, self.session_key))
+
+    def test_commit_after_fresh_load(self):
+        holder, game = self._load()
+        game.draw()
+        views._save_game_to_session(holder, game)
+        views._commit_game_session(holder)
+        self.assertEqual(self._load()[1].version, game.version)
+
+
+class GameEndTests(TestCase):
+    def test_snapshot_after_last_card(self):
+        for seed in range(5):
+            game = _play_out(_new_game(players=3, seed=seed))
+            snapshot = game.snapshot()
+            self.assertTrue(snapshot.game_over)
+            self.assertEqual(snapshot.version, game.version)
+            self.assertEqual(sorted(p.username for p in snapshot.finished), ["AI-1", "AI-2", "AI-3"])
+            self.assertIn(snapshot.finished[-1].username, game.scoreboard())
+
+    @override_settings(UNO_TURN_TIMEOUT=0, UNO_GAME_IDLE_TIMEOUT=0, UNO_TIMING_SAMPLE_RATE=0)
+    def test_spectators_see_the_result(self):
+        game = _new_game()
+        holder = SimpleNamespace(session=_stored_session(None))
+        views._save_game_to_session(holder, game)
+        views._save_game_to_session(holder, _play_out(game))
+        state = Client().get(f"/watch/{game.id}/?format=json").json()
+        self.assertTrue(state["game_over"])
+        self.assertEqual(len(state["finished"]), 2)
+
+
+class CardTests(TestCase):
+    def test_playing_wilds_never_changes_the_shared_cards(self):
+        faces = [(card.id, card.color) for card in CARD_PROTOTYPES]
+        wilds = 0
+        for seed in range(5):
+            game = _new_game(players=3, seed=seed)
+            while game.queue:
+                _take_turn(game)
+                top = game.discard[-1]
+                if top.wild:
+                    wilds += 1
+                    self.assertIsNot(top, Card.from_code(top.get_code()))
+        self.assertGreater(wilds, 0)
+        self.assertEqual([(card.id, card.color) for card in CARD_PROTOTYPES], faces)
+        with self.assertRaises(AttributeError):
+            Card.from_code(CARD_CODES[("", "WILD")]).color = "R"
+
+    def test_shared_cards_stay_shared_through_pickling(self):
+        game = pickle.loads(pickle.dumps(_new_game()))
+        for player in game.players.values():
+            for card in player.hand:
+                self.assertIs(card, Card.from_code(card.get_code()))
+
+
+class AnalyticsStoreTests(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = analytics.GameStore(self.path)
+        rng = random.Random(0)
+        rows = []
+        for game in range(300):
+            players = rng.randint(2, 5)
+            for seat, rank in enumerate(rng.sample(range(1, players + 1), players)):
+                rows.append({"game": game, "seat": seat, "rank": rank, "players": players,
+                             "duration": rng.random() * 100, "drawn": rng.randint(7, 60)})
+        self.store.append_rows(rows)
+
+    def test_vectorized_group_by_matches_row_scan(self):
+        queries = [(["seat"], "won", "mean", None), (["players", "seat"], "drawn", "max", None),
+                   ([], "duration", "min", None), (["seat"], "drawn", "sum", {"players": 3})]
+        for query in queries:
+            vectorized = self.store.group_by(*query)
+            with mock.patch.object(analytics, "np", None):
+                scanned = self.store.group_by(*query)
+            self.assertEqual(list(vectorized), list(scanned))
+            for key in scanned:
+                self.assertAlmostEqual(vectorized[key], scanned[key], places=3)
+
+    def test_half_written_row_is_cut_off(self):
+        rows = len(self.store)
+        with open(os.path.join(self.path, "seat.bin"), "ab") as f:
+            f.write(b"\x01")
+        store = analytics.GameStore(self.path)
+        self.assertEqual(os.path.getsize(os.path.join(self.path, "seat.bin")), rows)
+        self.assertEqual(store.games(), 300)
+
+
+class MatchmakerTests(TestCase):
+    def test_tickets_not_checked_on_expire(self):
+        matchmaker = Matchmaker(ai_wait=1000, ttl=20)
+        kept, _ = matchmaker.join("Kept", 4, "classic", True, now=0)
+        gone, _ = matchmaker.join("Gone", 4, "classic", True, now=0)
+        matchmaker.waiting(kept.id, now=15)
+        matchmaker.tick(now=25)
+        self.assertIsNone(matchmaker.waiting(gone.id, now=25))
+        self.assertEqual(matchmaker.waiting(kept.id, now=25)[1], 1)
+        matchmaker.tick(now=50)
+        self.assertEqual(matchmaker.tickets, {})
+
+    def test_unclaimed_seats_are_dropped(self):
+        matchmaker = Matchmaker(ttl=20)
+        matchmaker.assign(1, "seat-1", now=0)
+        matchmaker.assign(2, "seat-2", now=10)
+        matchmaker.tick(now=25)
+        self.assertIsNone(matchmaker.claim(1))
+        self.assertEqual(matchmaker.claim(2), "seat-2")
+        self.assertEqual(len(matchmaker.assigned), 0)
+
+
+class GameReaperTests(TestCase):
+    def setUp(self):
+        self.evicted = []
+        self.reaper = GameReaper(idle=10, batch=2)
+        self.reaper.on_evict = self._evict
+
+    def _evict(self, game_id, session_key):
+        if game_id == "broken":
+            raise Exception("no such session")
+        self.evicted.append(game_id)
+        return len(session_key)
+
+    def test_sweep_evicts_at_most_a_batch(self):
+        for i in range(5):
+            self.reaper.track(f"game-{i}", f"session-{i}", last_active=0)
+        self.assertEqual(self.reaper.sweep(now=100, batch=0), 0)
+        self.assertEqual(len(self.reaper.backlog), 5)
+        self.assertEqual(self.reaper.sweep(now=100), 2)
+        self.assertEqual(self.evicted, ["game-0", "game-1"])
+        while self.reaper.backlog:
+            self.reaper.sweep(now=100)
+        self.assertEqual(self.evicted, [f"game-{i}" for i in range(5)])
+        self.assertEqual(self.reaper.metrics()["reclaimed_bytes"], 5 * len("session-0"))
+
+    def test_games_come_due_after_the_idle_time(self):
+        now = time.time()
+        self.reaper.track("game", "session", last_active=now)
+        self.assertEqual(self.reaper.sweep(now=now + 5), 0)
+        self.assertEqual(self.reaper.sweep(now=now + 12), 1)
+        self.assertEqual(self.evicted, ["game"])
+        self.assertEqual(len(self.reaper), 0)
+
+    def test_game_touched_while_in_the_backlog_is_kept(self):
+        self.reaper.track("game", "session", last_active=0)
+        self.reaper.track("game", "session", last_active=time.time())
+        self.assertEqual(self.reaper.sweep(now=time.time(), batch=10), 0)
+        self.assertEqual(self.evicted, [])
+        self.assertIn("game", self.reaper.wheel)
+
+    def test_failed_evictions_are_counted_and_skipped(self):
+        self.reaper.track("broken", "session", last_active=0)
+        self.reaper.track("game", "session", last_active=0)
+        with self.assertLogs("gameplay.reaper", "ERROR"):
+            self.assertEqual(self.reaper.sweep(now=100), 1)
+        metrics = self.reaper.metrics()
+        self.assertEqual((metrics["evicted"], metrics["failed"]), (1, 1))
+
+
+def _results(game, *seats):
+    return {"game": game, "finished_at": 0, "players": [
+        {"name": name, "is_ai": name.startswith("AI-"), "rank": rank, "drawn": 0}
+        for rank, name in enumerate(seats, start=1)]}
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "results.jsonl")
+
+    def test_ai_and_unnamed_seats_are_not_recorded(self):
+        board = Leaderboard(self.path)
+        board.record(_results("a", "Ann", "AI-1", "Player2"))
+        board.record(_results("b", "Bob", "AI-1", "Player1"))
+        self.assertEqual(sorted(board.players), ["Ann", "Bob"])
+        # Each beat two fresh opponents, rather than one pooled AI-1 that has already lost.
+        self.assertEqual(board.get("Ann").rating, board.get("Bob").rating)
+        self.assertGreater(board.get("Bob").rating, 1500)
+        self.assertIsNone(board.rank("AI-1"))
+
+    def test_games_recorded_by_another_process_are_read_in(self):
+        board, other = Leaderboard(self.path), Leaderboard(self.path)
+        board.record(_results("a", "Ann", "Bob"))
+        other.record(_results("b", "Bob", "Ann"))
+        board.record(_results("c", "Cat", "Ann"))
+        expected = [(rank, record.name, record.rating) for rank, record in board.top()]
+        for view in (board, other, Leaderboard(self.path)):
+            self.assertEqual([(rank, record.name, record.rating) for rank, record in view.top()], expected)
+            self.assertEqual(view.games, 3)
+
+    def test_rating_index_matches_a_sorted_list(self):
+        rng = random.Random(0)
+        index, points = RatingIndex(), {}
+        for step in range(3000):
+            name = f"p{rng.randrange(300)}"
+            if name in points and rng.random() < 0.3:
+                index.remove(name, points.pop(name))
+            else:
+                if name in points:
+                    index.remove(name, points[name])
+                points[name] = rng.choice([0, 4000, rng.randint(1400, 1600)])
+                index.add(name, points[name])
+            if step % 100:
+                continue
+            ordered = sorted(points, key=lambda n: (-points[n], n))
+            self.assertEqual(index.top(25), ordered[:25])
+            for name in ordered[::7]:
+                self.assertEqual(index.rank(points[name]), 1 + sum(p > points[name] for p in points.values()))
+
+
+class TimerWheelTests(TestCase):
+    def test_timers_expire_in_deadline_order(self):
+        # A small wheel, so timers cascade down levels and spill into the overflow.
+        rng = random.Random(0)
+        wheel, due, deadlines, now = TimerWheel(slots=4, levels=2), {}, {}, 0
+        for _ in range(400):
+            for _ in range(rng.randint(0, 5)):
+                key = rng.randrange(100)
+                deadline = now + rng.choice([0.5, rng.uniform(1, 20), rng.uniform(20, 200)])
+                wheel.arm(key, deadline)
+                deadlines[key] = deadline
+                # Deadlines round up to whole ticks, and at least to the next one.
+                due[key] = max(math.ceil(deadline), now + 1)
+            if due and rng.random() < 0.3:
+                key = rng.choice(sorted(due))
+                self.assertTrue(wheel.cancel(key))
+                del due[key]
+            now += rng.choice([1, 1, 3, 30])
+            expired = wheel.advance(now)
+            self.assertEqual([due[key] for key in expired], sorted(due[key] for key in expired))
+            self.assertTrue(all(deadlines[key] <= now for key in expired))
+            self.assertEqual(sorted(expired), sorted(key for key, tick in due.items() if tick <= now))
+            for key in expired:
+                del due[key]
+            self.assertEqual(len(wheel), len(due))
+
+
+class ReplayTests(TestCase):
+    def test_archived_games_replay_to_the_same_end(self):
+        archive = ReplayArchive(os.path.join(tempfile.mkdtemp(), "games.unor"))
+        games = [_play_out(_new_game(players=players, seed=seed)) for seed, players in ((1, 2), (2, 4), (3, 6))]
+        for game in games:
+            archive.append(game)
+        self.assertEqual(len(list(archive.records())), len(games))
+        for game, record, mapped in zip(games, archive.records(), archive.mapped()):
+            self.assertEqual(record, mapped)
+            self.assertEqual((record.seed, record.started), (game.seed, int(game.time_started)))
+            self.assertEqual(record.seats, tuple((p.username, p.is_ai) for p in game.players.values()))
+            replayed = replay(record)
+            self.assertEqual(replayed.moves.tobytes(), game.moves.tobytes())
+            self.assertEqual([p.id for p in replayed.finished], [p.id for p in game.finished])
+            self.assertEqual(replayed.drawn, game.drawn)
+            self.assertEqual([str(card) for card in replayed.discard], [str(card) for card in game.discard])
+
+    def test_long_names_are_cut_between_characters(self):
+        archive = ReplayArchive(os.path.join(tempfile.mkdtemp(), "games.unor"))
+        game = UnoGame(seed=1)
+        game.add_player("é" * 128)
+        game.add_player("AI-1", True)
+        game.start()
+        archive.append(_play_out(game))
+        (record,) = archive.records()
+        self.assertEqual(record.seats, (("é" * 127, False), ("AI-1", True)))
+
+
+def _state_fields(state: GameState) -> dict:
+    return {"deck": state.deck_codes(), "discard": state.discard_cards(), "hands": state.hands,
+            "hand_sizes": state.hand_sizes, "queue": state.queue, "called": state.called,
+            "finished": state.finished, "called_out": state.called_out, "drawn": state.drawn,
+            "shuffles": state.shuffles}
+
+
+class GameStateTests(TestCase):
+    def test_moves_match_the_game_move_by_move(self):
+        for seed, players in ((1, 2), (2, 3), (3, 5), (4, 8)):
+            game = _new_game(players=players, seed=seed)
+            state = GameState.start(players, [rule.value for rule in game.rules], seed)
+            self.assertEqual(_state_fields(state), _state_fields(GameState.from_game(game)))
+            seen = 0
+            while game.queue:
+                _take_turn(game)
+                for move in iter_moves(game.moves[seen:]):
+                    state = state.apply(move)
+                seen = len(game.moves)
+                self.assertEqual(_state_fields(state), _state_fields(GameState.from_game(game)))
+            self.assertTrue(state.game_over)
+
+
+@skipIf(env.np is None, "the environments need NumPy")
+class VectorEnvTests(TestCase):
+    def test_steps_match_the_game_move_by_move(self):
+        rng = random.Random(0)
+        for players in (2, 4, 7):
+            vector = env.VectorEnv(1, players, seed=10)
+            obs, masks = vector.reset()
+            for _ in range(3):
+                game = _new_game(players=players, seed=vector.tables[0].seed)
+                while True:
+                    seat = game.get_curr_player().id
+                    self.assertEqual(vector.seats[0], seat)
+                    for player in game.players.values():
+                        counts = [0] * len(CARD_TYPES)
+                        for card in player.hand:
+                            counts[card.get_code()] += 1
+                        self.assertEqual(vector.hands[0, player.id].tolist(), counts)
+                    legal_moves = GameState.from_game(game).legal_moves()
+                    self.assertEqual(sorted(env.ACTIONS.index(m) for m in legal_moves),
+                                     env.np.flatnonzero(masks[0]).tolist())
+
+                    action = rng.choice(env.np.flatnonzero(masks[0]).tolist())
+                    kind, code, color = env.ACTIONS[action]
+                    if kind == "play":
+                        card_color, rank = CARD_TYPES[code]
+                        game.play(f"{card_color} {rank}".strip().lower(), color)
+                    else:
+                        game.draw()
+                    obs, rewards, dones, masks = vector.step([action])
+                    self.assertEqual(rewards[0], float(not game.players[seat].hand))
+                    self.assertEqual(dones[0], not game.queue)
+                    if dones[0]:
+                        break
+
+
+class SoakTests(TestCase):
+    def test_adversarial_scenarios_keep_cycling_cards(self):
+        for name, turns, window in (("draws", 600, 200), ("false_callouts", 300, 100)):
+            result = soak.soak(soak.SCENARIOS[name], turns, window=window, seed=1, trace_memory=False)
+            self.assertEqual([flag for flag in result.flags if flag.startswith("stalled")], [])
+            for w in result.windows[1:]:
+                self.assertGreater(w.shuffles, 0)
+                self.assertGreater(w.penalties, 0)
+
+    def test_seeded_runs_repeat_without_touching_the_global_random_state(self):
+        state = random.getstate()
+        runs = [soak.soak(soak.SCENARIOS["normal"], 400, window=100, seed=7, trace_memory=False) for _ in range(2)]
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual(runs[0].games, runs[1].games)
+        self.assertEqual([(w.shuffles, w.penalties) for w in runs[0].windows],
+                         [(w.shuffles, w.penalties) for w in runs[1].windows])
+        self.assertEqual(memory.new_game(2, {}, 7).deck, memory.new_game(2, {}, 7).deck)
+
+
+class GameLocksTests(TestCase):
+    def test_async_holders_of_one_game_take_turns(self):
+        locks, log = GameLocks(), []
+
+        async def act(game_id, name):
+            async with locks.ahold(game_id):
+                log.append((game_id, name, "in"))
+                await asyncio.sleep(0.01)
+                log.append((game_id, name, "out"))
+
+        async def main():
+            await asyncio.gather(act("a", 1), act("a", 2), act("b", 3))
+
+        asyncio.run(main())
+        same_game = [entry for entry in log if entry[0] == "a"]
+        self.assertEqual([step for _, _, step in same_game], ["in", "out", "in", "out"])
+        # The other game did not wait for the first one.
+        self.assertLess(log.index(("b", 3, "in")), log.index(("a", same_game[0][1], "out")))
+        self.assertEqual(len(locks), 0)
+
+    def test_sync_and_async_holders_share_a_lock(self):
+        locks = GameLocks()
+
+        async def enter():
+            async with locks.ahold("a"):
+                return True
+
+        with locks.hold("a"):
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(asyncio.wait_for(enter(), 0.05))
+        # The cancelled wait left nothing behind.
+        self.assertEqual(len(locks), 0)
+        self.assertTrue(asyncio.run(asyncio.wait_for(enter(), 1)))
+
+
+CLIENT_FIELDS = ("version", "turn", "top", "deck", "counts", "finished", "viewer", "hand")
+
+
+def _apply_update(client, update):
+    """What a client holding `client` (a full state) shows after an update."""
+    if update.get("full"):
+        return {key: update[key] for key in CLIENT_FIELDS}
+    assert update["base"] == client["version"]
+    client = dict(client, version=update["version"])
+    for key in ("turn", "top", "deck", "finished"):
+        if key in update:
+            client[key] = update[key]
+    client["counts"] = dict(client["counts"])
+    client["counts"].update(update.get("counts", {}))
+    if "viewer" in update:
+        client["viewer"], client["hand"] = update["viewer"], update["hand"]
+    hand = dict(client["hand"] or {})
+    for code, n in update.get("added", {}).items():
+        hand[code] = hand.get(code, 0) + n
+    for code, n in update.get("removed", {}).items():
+        hand[code] -= n
+        if not hand[code]:
+            del hand[code]
+    if client["hand"] is not None or hand:
+        client["hand"] = hand
+    return client
+
+
+class DeltaTests(TestCase):
+    def test_updates_bring_any_client_up_to_date(self):
+        rng = random.Random(0)
+        game = _new_game(players=3, seed=2)
+        states, history, gaps = [], [], 0
+        while game.queue:
+            states.append(deltas.game_state(game))
+            history = deltas.remember(history, states[-1])
+            _take_turn(game)
+            current = states[-1]
+            for _ in range(5):
+                base = rng.choice(states[-40:])
+                client_viewer = rng.choice([None, 0, 1, 2])
+                viewer = rng.choice([None, 0, 1, 2])
+                client = {key: value for key, value in deltas.full_state(base, client_viewer).items() if key != "full"}
+                update = deltas.update_for(history, current, base["version"], viewer, client_viewer)
+                # Versions that fell out of the history get the full state.
+                self.assertEqual(update.get("full", False), deltas.find(history, base["version"]) is None)
+                gaps += len(states) - states.index(base) > deltas.MAX_HISTORY
+                expected = {key: value for key, value in deltas.full_state(current, viewer).items() if key != "full"}
+                self.assertEqual(_apply_update(client, update), expected)
+        self.assertGreater(gaps, 0)
+
+
+class UnseenCardsTests(TestCase):
+    def _assert_tracked(self, game):
+        # Every AI seat's unseen cards are exactly the deck plus the other hands.
+        for player in game.players.values():
+            expected = [0] * len(CARD_TYPES)
+            for code in game.deck:
+                expected[code] += 1
+            for other in game.players.values():
+                if other is not player:
+                    for card in other.hand:
+                        expected[card.get_code()] += 1
+            self.assertEqual(player.unseen.counts, expected)
+            self.assertEqual(player.unseen.total, len(game.deck) + sum(
+                len(other.hand) for other in game.players.values() if other is not player))
+
+    def test_tracker_follows_deals_reshuffles_and_callouts(self):
+        rng = random.Random(0)
+        penalties = 0
+        shuffles = 0
+        for seed in range(4):
+            game = _new_game(players=6, seed=seed)
+            self._assert_tracked(game)
+            for _ in range(600):
+                if not game.queue:
+                    break
+                player = game.get_curr_player()
+                command, color = player.select_card_to_play(game)
+                if command.startswith("play"):
+                    game.play(command[5:], color)
+                    # Forget UNO now and then so callouts have someone to catch.
+                    if len(player.hand) == 1 and rng.random() < 0.5:
+                        game.uno(player.id)
+                else:
+                    game.draw()
+                self._assert_tracked(game)
+                if game.queue and rng.random() < 0.3:
+                    dealt = sum(p.drawn for p in game.players.values())
+                    game.callout(rng.choice(game.queue).id)
+                    penalties += sum(p.drawn for p in game.players.values()) > dealt
+                    self._assert_tracked(game)
+            shuffles += game.shuffles - 1
+        self.assertGreater(shuffles, 0)
+        self.assertGreater(penalties, 0)
+
+    def test_wild_colour_ties_go_to_the_least_unseen_colour(self):
+        game = _new_game()
+        player = game.get_curr_player()
+        player.hand = [Card.from_code(CARD_CODES[("", "WILD")]).copy()]
+        player.cards_changed()
+        for code, (color, _) in enumerate(CARD_TYPES):
+            player.unseen.counts[code] = 1 if color == "B" else 5
+        self.assertEqual(player.select_card_to_play(game), ("play wild b", "B"))
@@ -0,0 +1,92 @@
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+
+class RequestTimings:
+    """Time spent in each named phase of one request.
+
+    Phases nest; each phase is charged only its own time, so time spent in
+    a nested phase (say the AI turns inside an engine action) is not counted
+    twice. `counts` records how often each phase ran.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._stack: List[List] = []
+
+    def enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed - nested
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"ms": round(seconds * 1000, 3), "count": self.counts[name]}
+            for name, seconds in self.durations.items()
+        }
+
+    def header(self, total: Optional[float] = None) -> str:
+        """Value for a Server-Timing response header."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items()]
+        parts.append(f"total;dur={(self.total() if total is None else total) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("uno_request_timings", default=None)
+
+
+def begin() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def end():
+    _current.set(None)
+
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Charge the enclosed block to `name` in the current request's timings.
+
+    Does nothing outside a timed request (management commands, the turn
+    timer thread).
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.enter(name)
+    try:
+        yield
+    finally:
+        timings.exit()
+
+
+def timed(name: str):
+    """Decorator form of phase()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
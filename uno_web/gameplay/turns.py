@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from gameplay.engine.timers import TimerWheel
+
+logger = logging.getLogger("gameplay.turns")
+
+
+class TurnScheduler:
+    """Tracks the turn deadline of every live game in this process.
+
+    Games arm their deadline here (through UnoGame.turn_timers) whenever the
+    turn advances. The views bind each game id to the session holding it, and
+    a background thread hands expired games to `on_expire(game_id, session_key)`.
+    """
+
+    def __init__(self, tick: float = 1.0):
+        self.wheel = TimerWheel(tick=tick, start=time.time())
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, str] = {}
+        self.on_expire: Optional[Callable[[str, str], None]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def arm(self, game_id: str, deadline: float):
+        with self.lock:
+            self.wheel.arm(game_id, deadline)
+        self._ensure_running()
+
+    def cancel(self, game_id: str):
+        with self.lock:
+            self.wheel.cancel(game_id)
+            self.sessions.pop(game_id, None)
+
+    def bind(self, game_id: str, session_key: Optional[str], deadline: Optional[float]):
+        """Record where a game is stored, re-arming its persisted deadline if needed."""
+        if not session_key:
+            return
+        with self.lock:
+            self.sessions[game_id] = session_key
+            if deadline is None or game_id in self.wheel:
+                return
+            self.wheel.arm(game_id, deadline)
+        self._ensure_running()
+
+    def tick(self, now: float = None) -> int:
+        with self.lock:
+            expired = self.wheel.advance(time.time() if now is None else now)
+            due = [(game_id, self.sessions.get(game_id)) for game_id in expired]
+
+        handled = 0
+        for game_id, session_key in due:
+            if session_key and self.on_expire:
+                self.on_expire(game_id, session_key)
+                handled += 1
+        return handled
+
+    def _ensure_running(self):
+        if self._thread is not None:
+            return
+        with self.lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="uno-turn-timers", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.wheel.tick)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.exception("Error expiring turns: %s", e)
+
+
+turn_scheduler = TurnScheduler()
@@ -1,66 +1,257 @@
 import pickle
 import base64
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import time
+from contextlib import contextmanager
+from importlib import import_module
+from types import SimpleNamespace
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
 
+from gameplay import deltas, timing
+from gameplay.analytics import GameStore
+from gameplay.concurrency import StaleGameError, game_locks
 from gameplay.engine.game import UnoGame
-from gameplay.engine.constants import COLOR_SYMBOLS
+from gameplay.engine.constants import CARD_TYPES, COLOR_SYMBOLS
+from gameplay.engine import legal
+from gameplay.engine.replay import ReplayArchive
+from gameplay.leaderboard import Leaderboard
+from gameplay.lobby import MAX_PLAYERS, MIN_PLAYERS, PRESETS, create_games, matchmaker
+from gameplay.reaper import game_reaper
+from gameplay.turns import turn_scheduler
+
+logger = logging.getLogger("gameplay")
 
 SESSION_KEY = "uno_game_pickle"
 TURN_REVEAL_KEY = "turn_revealed_for"
 WILD_COLOR_PENDING = "wild_color_pending"
-MESSAGES_KEY = "uno_messages"
+GAME_ID_KEY = "uno_game_id"
+GAME_VERSION_KEY = "uno_game_version"
+SPECTATOR_LOG_KEY = "uno_spectator_log"
+LOG_SEQ_KEY = "uno_log_seq"
+PUBLISHED_VERSION_KEY = "uno_published_version"
+RECORDED_KEY = "uno_recorded"
+GAMES_KEY = "uno_games"
+LOBBY_TICKET_KEY = "uno_lobby_ticket"
+
+PUBLIC_STATE_CACHE_KEY = "uno:public:{game_id}"
+SPECTATE_CACHE_KEY = "uno:spectate:{game_id}:{version}:{fmt}"
+STATE_HISTORY_CACHE_KEY = "uno:states:{game_id}"
+SPECTATE_TIMEOUT = 60 * 60
+FRAGMENT_CACHE_KEY = "uno:fragment:{game_id}:{seat}:{name}:{key}"
+# Cached fragments are shared between requests, so their forms are rendered
+# with these in place of the CSRF token and game version and filled in per request.
+CSRF_PLACEHOLDER = "__uno_csrf_token__"
+VERSION_PLACEHOLDER = "__uno_version__"
+HAND_PAGE_SIZE = 20
 
+@timing.timed("session_save")
 def _save_game_to_session(request, game_obj):
     """Save game state to session using pickle and base64."""
     pick = pickle.dumps(game_obj)
     request.session[SESSION_KEY] = base64.b64encode(pick).decode()
+    request.session[GAME_ID_KEY] = game_obj.id
+    request.session[GAME_VERSION_KEY] = game_obj.version
     request.session.modified = True
+    _publish_public_state(request, game_obj)
+
 
+def _decode_game(val):
+    """Decode a base64 pickled game as stored in the session."""
+    pick = base64.b64decode(val)
+    return pickle.loads(pick)
 
+
+@timing.timed("session_load")
 def _load_game_from_session(request):
     """Load game state from session."""
     val = request.session.get(SESSION_KEY)
     if not val:
         return None
     try:
-        pick = base64.b64decode(val)
-        game = pickle.loads(pick)
-        return game
+        game = _decode_game(val)
     except Exception as e:
-        print(f"Error loading game: {e}")
+        logger.warning("Error loading game: %s", e)
         return None
+    request.uno_game_version = game.version
+    return game
 
 
-def _clear_game(request):
-    """Clear all game-related session data."""
-    request.session.pop(SESSION_KEY, None)
-    request.session.pop(TURN_REVEAL_KEY, None)
-    request.session.pop(WILD_COLOR_PENDING, None)
-    request.session.pop(MESSAGES_KEY, None)
+@timing.timed("session_write")
+def _commit_game_session(request):
+    """Write a game's session back to the store, holding the game's lock.
+
+    If the stored session no longer holds the version of the game this
+    request loaded, another process saved the game in the meantime and
+    StaleGameError is raised instead of overwriting its move. With database
+    sessions the stored row is locked (select_for_update) from that check
+    until the write commits, so two processes cannot both pass the check.
+    """
+    session = request.session
+    loaded = getattr(request, "uno_game_version", None)
+    model = getattr(session, "model", None)
+    if loaded is None:
+        session.save()
+    elif model is None:
+        # Not stored in the database: the check and the write are separate steps.
+        _check_version(session.__class__(session.session_key).get(GAME_VERSION_KEY), loaded)
+        session.save()
+    else:
+        with transaction.atomic(using=router.db_for_write(model)):
+            row = model.objects.select_for_update().filter(session_key=session.session_key).first()
+            if row is not None:
+                _check_version(session.decode(row.session_data).get(GAME_VERSION_KEY), loaded)
+            session.save()
+    session.modified = False
+
+
+def _check_version(stored, loaded):
+    if stored is not None and stored != loaded:
+        raise StaleGameError(f"game is at version {stored}, this request loaded version {loaded}")
+
+
+def _refresh_session(request):
+    """Discard the session data read so far and load it again from the store."""
+    request.session = request.session.__class__(request.session.session_key)
+
+
+def _game_entry(request, game_id):
+    return request.session.get(GAMES_KEY, {}).get(game_id)
+
+
+@contextmanager
+def _game_session(request, game_id):
+    """Make request.session the session holding one of the player's games.
+
+    Every game is kept in a session of its own. The player's session only
+    lists their games (GAMES_KEY) with the key of each game's session and,
+    for lobby tables shared with other players, their seat, which is set as
+    request.uno_seat. Only the requested game is ever loaded. The player's
+    session is put back afterwards so the session middleware never hands out
+    a game's cookie.
+    """
+    entry = _game_entry(request, game_id)
+    game_reaper.touch(game_id, entry["session"])
+    request.player_session = request.session
+    request.session = request.session.__class__(entry["session"])
+    request.uno_seat = entry["seat"]
+    try:
+        yield
+    finally:
+        request.session = request.player_session
+
+
+def _in_game_session(view):
+    """Run a read-only view of one game with request.session set as by _game_session()."""
+    @functools.wraps(view)
+    def wrapper(request, game_id, *args, **kwargs):
+        if _game_entry(request, game_id) is None:
+            return JsonResponse({"error": "No such game"}, status=404)
+        with _game_session(request, game_id):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _add_game(request, game, session_key, seat=None):
+    """List a game, stored in the given session, among the player's games."""
+    games = request.session.get(GAMES_KEY, {})
+    games[game.id] = {
+        "session": session_key,
+        "seat": seat,
+        "players": [player.username for player in game.players.values()],
+        "created": time.time(),
+    }
+    request.session[GAMES_KEY] = games
     request.session.modified = True
 
 
+def _forget_game(request, game_id):
+    """Drop a game from the list of games of the player behind _game_session()."""
+    games = request.player_session.get(GAMES_KEY, {})
+    if games.pop(game_id, None) is not None:
+        request.player_session[GAMES_KEY] = games
+        request.player_session.modified = True
+
+
+def _leave_table(request):
+    """Detach the player from the lobby table they are seated at."""
+    _forget_game(request, request.session.get(GAME_ID_KEY))
+
+
+def _active_games(request):
+    """The player's games, newest first, listed from their session without loading any game."""
+    games = sorted(request.session.get(GAMES_KEY, {}).items(), key=lambda item: item[1]["created"], reverse=True)
+    return [
+        {"id": game_id, "players": entry["players"], "seated": entry["seat"] is not None}
+        for game_id, entry in games
+    ]
+
+
+def _new_game_session(game, message):
+    """Store a freshly started game in a session of its own and return that session."""
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    holder = SimpleNamespace(session=session_store())
+    _save_game_to_session(holder, game)
+    holder.session[TURN_REVEAL_KEY] = None
+    holder.session[WILD_COLOR_PENDING] = False
+    _add_message(holder, message)
+    if game.get_curr_player().is_ai:
+        game = _process_ai_turns(game, holder)
+        _save_game_to_session(holder, game)
+    holder.session.save()
+    game_reaper.touch(game.id, holder.session.session_key)
+    return holder.session
+
+
+def _hand_revealed(request, current_player) -> bool:
+    seat = getattr(request, "uno_seat", None)
+    if seat is not None:
+        return seat == current_player.id
+    return request.session.get(TURN_REVEAL_KEY) == current_player.id
+
+
+def _clear_game(request):
+    """Delete the game's session and drop the game from the player's games."""
+    game_id = request.session.get(GAME_ID_KEY)
+    if game_id:
+        turn_scheduler.cancel(game_id)
+        game_reaper.forget(game_id)
+        _forget_game(request, game_id)
+    request.session.delete()
+    request.session.modified = False
+
+
 def _add_message(request, msg):
-    """Add a message to the session messages list."""
-    messages = request.session.get(MESSAGES_KEY, [])
-    messages.append(msg)
-    request.session[MESSAGES_KEY] = messages[-20:]  
+    """Add a message to the game's log, shared by the players and spectators."""
+    log = request.session.get(SPECTATOR_LOG_KEY, [])
+    log.append(msg)
+    request.session[SPECTATOR_LOG_KEY] = log[-20:]
+    request.session[LOG_SEQ_KEY] = request.session.get(LOG_SEQ_KEY, 0) + 1
     request.session.modified = True
 
 
-def _get_messages(request, clear=True):
-    """Get messages from session and optionally clear them."""
-    messages = request.session.get(MESSAGES_KEY, [])
-    if clear:
-        request.session[MESSAGES_KEY] = []
-        request.session.modified = True
-    return messages
+def _get_messages(request):
+    """Get the most recent messages of the game's log."""
+    return list(request.session.get(SPECTATOR_LOG_KEY, []))
+
 
+def _format_card_for_template(card, top=None):
+    """Return dict representing card for template rendering.
 
-def _format_card_for_template(card):
-    """Return dict representing card for template rendering."""
+    When the top of the discard pile is given, the card is also marked with
+    whether it can legally be played on it.
+    """
     if not card:
         return None
     
@@ -97,10 +288,93 @@ def _format_card_for_template(card):
         "display": display,
         "color_name": color_name,
         "symbol": symbol,
-        "card_str": card_str
+        "card_str": card_str,
+        "playable": legal.is_playable(card, top) if top else True
     }
 
 
+def _public_state(game, log):
+    """Build the state every spectator of a game sees, without any hands."""
+    snapshot = game.snapshot()
+    return {
+        "game_id": snapshot.game_id,
+        "version": snapshot.version,
+        "top_card": _format_card_for_template(snapshot.top_card),
+        "players": [
+            {
+                "username": p.username,
+                "is_ai": p.is_ai,
+                "card_count": p.card_count,
+                "called_uno": p.called,
+                "is_current": i == 0,
+            }
+            for i, p in enumerate(snapshot.players)
+        ],
+        "finished": [p.username for p in snapshot.finished],
+        "deck_count": snapshot.deck_count,
+        "messages": list(log[-10:]),
+        "game_over": snapshot.game_over,
+    }
+
+
+def _publish_public_state(request, game):
+    """Publish the spectator state once per game version."""
+    if request.session.get(PUBLISHED_VERSION_KEY) == [game.id, game.version]:
+        return
+    state = _public_state(game, request.session.get(SPECTATOR_LOG_KEY, []))
+    cache.set(PUBLIC_STATE_CACHE_KEY.format(game_id=game.id), state, SPECTATE_TIMEOUT)
+    request.session[PUBLISHED_VERSION_KEY] = [game.id, game.version]
+
+
+_analytics_store = None
+_replay_archives = {}
+_leaderboard = None
+
+
+def _record_finished_game(game):
+    """Append a finished game to the analytics store, the replay archive and the leaderboard, if configured."""
+    global _analytics_store
+    path = getattr(settings, "UNO_ANALYTICS_DIR", None)
+    if path:
+        try:
+            if _analytics_store is None:
+                _analytics_store = GameStore(path)
+            _analytics_store.append_game(game)
+        except Exception as e:
+            logger.exception("Error recording game analytics: %s", e)
+
+    _archive_replay(game)
+
+    board = _get_leaderboard()
+    if board is not None:
+        try:
+            board.record_game(game)
+        except Exception as e:
+            logger.exception("Error updating the leaderboard: %s", e)
+
+
+def _get_leaderboard():
+    global _leaderboard
+    path = getattr(settings, "UNO_LEADERBOARD_FILE", None)
+    if path and _leaderboard is None:
+        _leaderboard = Leaderboard(path)
+    return _leaderboard
+
+
+def _archive_replay(game, setting="UNO_REPLAY_ARCHIVE"):
+    """Append a game to the replay archive named by a setting, if configured."""
+    path = getattr(settings, setting, None)
+    if path:
+        try:
+            archive = _replay_archives.get(str(path))
+            if archive is None:
+                archive = _replay_archives[str(path)] = ReplayArchive(path)
+            archive.append(game)
+        except Exception as e:
+            logger.exception("Error archiving game replay: %s", e)
+
+
+@timing.timed("ai")
 def _process_ai_turns(game: UnoGame, request):
     """Process AI turns until it's a human player's turn or game ends."""
     messages_added = []
@@ -151,6 +425,64 @@ def _process_ai_turns(game: UnoGame, request):
     return game
 
 
+def _apply_turn_timeout(request, game: UnoGame):
+    """Play an overdue turn for the current player, then run the AI seats."""
+    _add_message(request, f"⏰ {game.auto_play()}")
+    request.session[TURN_REVEAL_KEY] = None
+    request.session[WILD_COLOR_PENDING] = None
+    if game.queue:
+        game = _process_ai_turns(game, request)
+    _save_game_to_session(request, game)
+    return game
+
+
+def expire_session_turn(game_id, session_key):
+    """Apply an expired turn deadline to a game stored in any session."""
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    with game_locks.hold(game_id):
+        request = SimpleNamespace(session=session_store(session_key))
+        game = _load_game_from_session(request)
+        if not game or game.id != game_id:
+            turn_scheduler.cancel(game_id)
+            return
+        if game.turn_expired():
+            _apply_turn_timeout(request, game)
+            try:
+                _commit_game_session(request)
+            except StaleGameError as e:
+                logger.info("Turn timeout for game %s dropped: %s", game_id, e)
+                return
+        elif game.queue and game.turn_deadline is not None:
+            # The deadline moved (or the timer came early); wait for it again.
+            turn_scheduler.arm(game_id, game.turn_deadline)
+        if not game.queue:
+            turn_scheduler.cancel(game_id)
+
+
+def reap_session_game(game_id, session_key):
+    """Archive an idle game and delete the session holding it.
+
+    Returns the size of the session data reclaimed, or None when the session
+    no longer holds that game. Unfinished games are archived as replays of
+    their moves so far, apart from the finished ones (UNO_ABANDONED_ARCHIVE);
+    finished ones are recorded as usual unless a seated player already did.
+    """
+    session_store = import_module(settings.SESSION_ENGINE).SessionStore
+    with game_locks.hold(game_id):
+        holder = SimpleNamespace(session=session_store(session_key))
+        game = _load_game_from_session(holder)
+        if not game or game.id != game_id:
+            return None
+        size = len(holder.session.encode(dict(holder.session.items())))
+        if game.queue:
+            _archive_replay(game, "UNO_ABANDONED_ARCHIVE")
+        elif not holder.session.get(RECORDED_KEY):
+            _record_finished_game(game)
+        turn_scheduler.cancel(game_id)
+        holder.session.delete()
+    return size
+
+
 @require_http_methods(["GET", "POST"])
 def start_game_view(request):
     """Create a new game from form input."""
@@ -177,10 +509,12 @@ def start_game_view(request):
         
         if len(names) + ai_count < 2:
             return render(request, "gameplay/start.html", {
-                "error": "Need at least 2 players to start a game!"
+                "error": "Need at least 2 players to start a game!",
+                "games": _active_games(request),
             })
         
         game = UnoGame()
+        game.get_rule("Turn Timeout").value = getattr(settings, "UNO_TURN_TIMEOUT", 0)
         
         for name in names:
             game.add_player(name, is_ai=False)
@@ -190,200 +524,327 @@ def start_game_view(request):
         
         try:
             game.start()
-            _save_game_to_session(request, game)
-            request.session[TURN_REVEAL_KEY] = None
-            request.session[WILD_COLOR_PENDING] = False
-            _add_message(request, f"🎮 Game started! {game.get_curr_player().username} goes first.")
-            
-            if game.get_curr_player().is_ai:
-                game = _process_ai_turns(game, request)
-                _save_game_to_session(request, game)
-            
-            return redirect("uno_game")
+            session = _new_game_session(game, f"🎮 Game started! {game.get_curr_player().username} goes first.")
+            _add_game(request, game, session.session_key)
+            return redirect("uno_game", game_id=game.id)
         except Exception as e:
             return render(request, "gameplay/start.html", {
-                "error": f"Failed to start game: {e}"
+                "error": f"Failed to start game: {e}",
+                "games": _active_games(request),
             })
     
-    return render(request, "gameplay/start.html", {})
+    return render(request, "gameplay/start.html", {"games": _active_games(request)})
+
+
+def _open_tables(matches):
+    """Create the games for a batch of lobby matches, each in a table session of its own."""
+    if not matches:
+        return
+    games = create_games(matches, getattr(settings, "UNO_TURN_TIMEOUT", 0))
+    for match, game in zip(matches, games):
+        table = _new_game_session(game, f"🎮 Lobby game started! {game.get_curr_player().username} goes first.")
+        for seat, ticket in enumerate(match.tickets):
+            matchmaker.assign(ticket.id, (game, table.session_key, seat))
 
 
 @require_http_methods(["GET", "POST"])
-def game_view(request):
-    """Main game view - handles all game actions."""
-    game: UnoGame = _load_game_from_session(request)
-    if not game:
-        return redirect("uno_start")
+def lobby_view(request):
+    """Queue for a game with other players; the page refreshes until a table is ready."""
+    if request.method == "POST":
+        ticket_id = request.session.pop(LOBBY_TICKET_KEY, None)
+        if ticket_id:
+            matchmaker.leave(ticket_id)
+        if request.POST.get("action") == "join":
+            name = request.POST.get("name", "").strip()[:40] or "Player"
+            try:
+                players = int(request.POST.get("players", "4"))
+            except ValueError:
+                players = 4
+            preset = request.POST.get("preset", "classic")
+            try:
+                ticket, matches = matchmaker.join(name, players, preset, request.POST.get("ai_fill") == "on")
+            except ValueError as e:
+                return render(request, "gameplay/lobby.html", {"error": str(e), "presets": PRESETS,
+                                                               "min_players": MIN_PLAYERS, "max_players": MAX_PLAYERS})
+            request.session[LOBBY_TICKET_KEY] = ticket.id
+            _open_tables(matches)
+        return redirect("uno_lobby")
+
+    _open_tables(matchmaker.tick())
+    ticket_id = request.session.get(LOBBY_TICKET_KEY)
+    if ticket_id:
+        assigned = matchmaker.claim(ticket_id)
+        if assigned is not None:
+            game, session_key, seat = assigned
+            request.session.pop(LOBBY_TICKET_KEY)
+            _add_game(request, game, session_key, seat)
+            return redirect("uno_game", game_id=game.id)
+
+    waiting = matchmaker.waiting(ticket_id) if ticket_id else None
+    if ticket_id and waiting is None:
+        request.session.pop(LOBBY_TICKET_KEY)
+    return render(request, "gameplay/lobby.html", {
+        "ticket": waiting[0] if waiting else None,
+        "waiting": waiting[1] if waiting else 0,
+        "presets": PRESETS,
+        "min_players": MIN_PLAYERS,
+        "max_players": MAX_PLAYERS,
+    })
+
+
+def _handle_action(request, game: UnoGame, current_player):
+    """Apply a POSTed action to the game; returns the response, or None to render the page."""
+    action = request.POST.get("action")
     
-    if not game.queue:
-        context = {
-            "game_over": True,
-            "scoreboard": game.scoreboard(),
-            "finished": game.finished
-        }
-        _clear_game(request)
-        return render(request, "gameplay/game.html", context)
+    posted_version = request.POST.get("version")
+    if posted_version and posted_version != str(game.version) and action != "quit":
+        _add_message(request, "⚠️ The game changed before your action arrived (another tab or a double click?), so it was ignored.")
+        return redirect("uno_game", game_id=game.id)
     
-    current_player = game.get_curr_player()
+    seat = getattr(request, "uno_seat", None)
+    if seat is not None and seat != current_player.id and action not in ("table", "quit"):
+        return redirect("uno_game", game_id=game.id)
     
-    if request.method == "POST":
-        action = request.POST.get("action")
+    if action == "start_turn":
+        request.session[TURN_REVEAL_KEY] = current_player.id
+        request.session.modified = True
+        _add_message(request, f"📋 {current_player.username}'s turn revealed")
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "end_turn":
+        request.session[TURN_REVEAL_KEY] = None
+        request.session.modified = True
+        _add_message(request, f"✅ Turn hidden. Pass device to next player.")
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "play":
+        card_input = request.POST.get("card_input", "").strip()
         
-        if action == "start_turn":
-            request.session[TURN_REVEAL_KEY] = current_player.id
-            request.session.modified = True
-            _add_message(request, f"📋 {current_player.username}'s turn revealed")
-            return redirect("uno_game")
+        is_wild_card = any(wild in card_input.upper() for wild in ["WILD+4", "WILD"])
         
-        elif action == "end_turn":
-            request.session[TURN_REVEAL_KEY] = None
+        if is_wild_card and not request.session.get(WILD_COLOR_PENDING):
+            request.session[WILD_COLOR_PENDING] = card_input
             request.session.modified = True
-            _add_message(request, f"✅ Turn hidden. Pass device to next player.")
-            return redirect("uno_game")
+            return redirect("uno_game", game_id=game.id)
         
-        elif action == "play":
-            card_input = request.POST.get("card_input", "").strip()
+        wild_color = request.POST.get("wild_color", "").strip().lower() if is_wild_card else None
+        
+        try:
+            if wild_color:
+                result = game.play(card_input)
+                _add_message(request, f"✅ {current_player.username} played {card_input} and chose {wild_color}")
+            else:
+                result = game.play(card_input)
+                _add_message(request, f"✅ {current_player.username} played {card_input}")
             
-            is_wild_card = any(wild in card_input.upper() for wild in ["WILD+4", "WILD"])
+            request.session[WILD_COLOR_PENDING] = None
             
-            if is_wild_card and not request.session.get(WILD_COLOR_PENDING):
-                request.session[WILD_COLOR_PENDING] = card_input
-                request.session.modified = True
-                return redirect("uno_game")
+            if "cannot play this card" in result.lower() or "not found in hand" in result.lower():
+                _add_message(request, f"❌ {result}")
+                return redirect("uno_game", game_id=game.id)
+
+            if current_player.finished:
+                _add_message(request, f"🎉 {current_player.username} finished in rank {len(game.finished)}!")
             
-            wild_color = request.POST.get("wild_color", "").strip().lower() if is_wild_card else None
+            if result and not any(x in result.lower() for x in ["cannot play", "not found"]):
+                _add_message(request, result)
             
+            _save_game_to_session(request, game)
+            game = _process_ai_turns(game, request)
+            _save_game_to_session(request, game)
+            
+            request.session[TURN_REVEAL_KEY] = None
+            
+        except Exception as e:
+            _add_message(request, f"❌ Could not play {card_input}: {e}")
+            request.session[WILD_COLOR_PENDING] = None
+        
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "select_wild_color":
+        wild_color = request.POST.get("wild_color", "").strip().lower()
+        pending_card = request.session.get(WILD_COLOR_PENDING)
+        
+        if pending_card and wild_color:
             try:
-                if wild_color:
-                    result = game.play(card_input)
-                    _add_message(request, f"✅ {current_player.username} played {card_input} and chose {wild_color}")
-                else:
-                    result = game.play(card_input)
-                    _add_message(request, f"✅ {current_player.username} played {card_input}")
+                result = game.play(pending_card + " " + wild_color[0], wild_color)
+                _add_message(request, f"✅ Played {pending_card} with color {wild_color}")
                 
-                request.session[WILD_COLOR_PENDING] = None
-                
-                if "cannot play this card" in result.lower() or "not found in hand" in result.lower():
-                    _add_message(request, f"❌ {result}")
-                    return redirect("uno_game")
-
-                if current_player.finished:
-                    _add_message(request, f"🎉 {current_player.username} finished in rank {len(game.finished)}!")
-                
-                if result and not any(x in result.lower() for x in ["cannot play", "not found"]):
-                    _add_message(request, result)
+                if len(current_player.hand) == 1 and not current_player.called:
+                    uno_result = game.uno(current_player.id)
+                    _add_message(request, uno_result)
                 
+                request.session[WILD_COLOR_PENDING] = None
                 _save_game_to_session(request, game)
+                
                 game = _process_ai_turns(game, request)
                 _save_game_to_session(request, game)
                 
                 request.session[TURN_REVEAL_KEY] = None
                 
             except Exception as e:
-                _add_message(request, f"❌ Could not play {card_input}: {e}")
+                _add_message(request, f"❌ Error: {e}")
                 request.session[WILD_COLOR_PENDING] = None
-            
-            return redirect("uno_game")
         
-        elif action == "select_wild_color":
-            wild_color = request.POST.get("wild_color", "").strip().lower()
-            pending_card = request.session.get(WILD_COLOR_PENDING)
+        return redirect("uno_game", game_id=game.id)
+     
+    elif action == "draw":
+        try:
+            result = game.draw()
+            _add_message(request, f"📥 {current_player.username} drew a card")
             
-            if pending_card and wild_color:
-                try:
-                    result = game.play(pending_card + " " + wild_color[0], wild_color)
-                    _add_message(request, f"✅ Played {pending_card} with color {wild_color}")
-                    
-                    if len(current_player.hand) == 1 and not current_player.called:
-                        uno_result = game.uno(current_player.id)
-                        _add_message(request, uno_result)
-                    
-                    request.session[WILD_COLOR_PENDING] = None
-                    _save_game_to_session(request, game)
-                    
-                    game = _process_ai_turns(game, request)
-                    _save_game_to_session(request, game)
-                    
-                    request.session[TURN_REVEAL_KEY] = None
-                    
-                except Exception as e:
-                    _add_message(request, f"❌ Error: {e}")
-                    request.session[WILD_COLOR_PENDING] = None
+            _save_game_to_session(request, game)
+            game = _process_ai_turns(game, request)
+            _save_game_to_session(request, game)
             
-            return redirect("uno_game")
-         
-        elif action == "draw":
-            try:
-                result = game.draw()
-                _add_message(request, f"📥 {current_player.username} drew a card")
-                
-                _save_game_to_session(request, game)
-                game = _process_ai_turns(game, request)
-                _save_game_to_session(request, game)
-                
-                request.session[TURN_REVEAL_KEY] = None
-                
-            except Exception as e:
-                _add_message(request, f"❌ Draw error: {e}")
+            request.session[TURN_REVEAL_KEY] = None
             
-            return redirect("uno_game")
+        except Exception as e:
+            _add_message(request, f"❌ Draw error: {e}")
         
-        elif action == "uno":
-            try:
-                result = game.uno(current_player.id)
-                _add_message(request, f"🎯 {current_player.username}: {result}")
-                _save_game_to_session(request, game)
-            except Exception as e:
-                _add_message(request, f"❌ UNO error: {e}")
-            
-            return redirect("uno_game")
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "uno":
+        try:
+            result = game.uno(current_player.id)
+            _add_message(request, f"🎯 {current_player.username}: {result}")
+            _save_game_to_session(request, game)
+        except Exception as e:
+            _add_message(request, f"❌ UNO error: {e}")
         
-        elif action == "callout":
-            try:
-                result = game.callout(current_player.id)
-                _add_message(request, f"📢 {current_player.username} called out: {result}")
-                _save_game_to_session(request, game)
-            except Exception as e:
-                _add_message(request, f"❌ Callout error: {e}")
-            
-            return redirect("uno_game")
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "callout":
+        try:
+            result = game.callout(current_player.id)
+            _add_message(request, f"📢 {current_player.username} called out: {result}")
+            _save_game_to_session(request, game)
+        except Exception as e:
+            _add_message(request, f"❌ Callout error: {e}")
         
-        elif action == "table":
-            try:
-                table_info = game.table()
-                _add_message(request, f"📊 Table Status:\n{table_info}")
-            except Exception as e:
-                _add_message(request, f"❌ Table error: {e}")
-            
-            return redirect("uno_game")
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "table":
+        try:
+            table_info = game.table()
+            _add_message(request, f"📊 Table Status:\n{table_info}")
+        except Exception as e:
+            _add_message(request, f"❌ Table error: {e}")
         
-        elif action == "quit":
+        return redirect("uno_game", game_id=game.id)
+    
+    elif action == "quit":
+        if seat is not None:
+            _add_message(request, f"🚪 {game.players[seat].username} left the table.")
+            _leave_table(request)
+        else:
             _clear_game(request)
-            return redirect("uno_start")
+        return redirect("uno_start")
     
-    game = _load_game_from_session(request)
-    if not game or not game.queue:
+    return None
+
+
+@require_http_methods(["GET", "POST"])
+def game_view(request, game_id):
+    """Main game view - handles all game actions.
+
+    Requests for the same game are serialized: the session is re-read and
+    written back while holding the game's lock, so concurrent requests
+    (double clicks, two tabs, turn timeouts) never overwrite each other's
+    changes. Only the game named in the URL is loaded.
+    """
+    if _game_entry(request, game_id) is None:
         return redirect("uno_start")
+    with _game_session(request, game_id), game_locks.hold(game_id):
+        _refresh_session(request)
+        response = _game_view(request, game_id)
+        if request.session.modified:
+            try:
+                _commit_game_session(request)
+            except StaleGameError as e:
+                # Someone else's move got in first; show them the game as it is now.
+                logger.info("Discarding action on game %s: %s", game_id, e)
+                return redirect("uno_game", game_id=game_id)
+    return response
+
+
+def _game_view(request, game_id):
+    game: UnoGame = _load_game_from_session(request)
+    if not game:
+        # The game's session expired; drop it from the player's games.
+        _forget_game(request, game_id)
+        return redirect("uno_start")
+    
+    turn_scheduler.bind(game.id, request.session.session_key, game.turn_deadline)
+    if game.turn_expired():
+        game = _apply_turn_timeout(request, game)
+    
+    if not game.queue:
+        if not request.session.get(RECORDED_KEY):
+            _record_finished_game(game)
+        context = {
+            "game_over": True,
+            "scoreboard": game.scoreboard(),
+            "finished": game.finished
+        }
+        if request.uno_seat is None:
+            _clear_game(request)
+        else:
+            # The table stays until every seated player has seen the result.
+            request.session[RECORDED_KEY] = True
+            request.session.modified = True
+            _leave_table(request)
+        with timing.phase("render"):
+            return render(request, "gameplay/game.html", context)
     
     current_player = game.get_curr_player()
     
-    turn_revealed_for = request.session.get(TURN_REVEAL_KEY)
-    reveal_hand = (turn_revealed_for == current_player.id)
+    if request.method == "POST":
+        with timing.phase("engine"):
+            response = _handle_action(request, game, current_player)
+        if response is not None:
+            return response
     
-    wild_pending = request.session.get(WILD_COLOR_PENDING)
+    if not game.queue:
+        return redirect("uno_start")
     
+    context = _game_context(request, game)
+    with timing.phase("render"):
+        return render(request, "gameplay/game.html", context)
+
+
+def _digest(*parts) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+def _current_player_info(current_player):
+    return {
+        "id": current_player.id,
+        "username": current_player.username,
+        "is_ai": current_player.is_ai,
+        "card_count": current_player.card_count,
+        "called_uno": current_player.called
+    }
+
+
+def _heading_context(request, game, snapshot):
+    return {"current_player": _current_player_info(snapshot.current)}
+
+
+def _players_context(request, game, snapshot):
+    current_player = snapshot.current
     players_info = []
-    for p in game.queue:
+    for p in snapshot.players:
         players_info.append({
             "id": p.id,
             "username": p.username,
             "is_ai": p.is_ai,
-            "card_count": len(p.hand),
+            "card_count": p.card_count,
             "called_uno": p.called,
             "is_current": (p.id == current_player.id)
         })
     
-    for i, p in enumerate(game.finished, 1):
+    for i, p in enumerate(snapshot.finished, 1):
         players_info.append({
             "id": p.id,
             "username": f"{p.username} (Rank {i})",
@@ -393,44 +854,276 @@ def game_view(request):
             "is_current": False,
             "finished": True
         })
-    
+    return {"players": players_info}
+
+
+def _discard_context(request, game, snapshot):
+    return {
+        "discard_top": _format_card_for_template(snapshot.top_card),
+        "discard_history": [_format_card_for_template(card) for card in snapshot.recent_discard],
+        "deck_count": snapshot.deck_count,
+    }
+
+
+def _hand_runs(hand):
+    """(card, count) for each run of identical cards in a sorted hand."""
+    runs = []
+    for _, run in itertools.groupby(hand, key=lambda card: card.get_code()):
+        first = next(run)
+        runs.append((first, 1 + sum(1 for _ in run)))
+    return runs
+
+
+def _hand_page(game, runs, top, page):
+    """Context for one page of a hand's card runs; only that page's cards are formatted."""
+    pages = max(1, -(-len(runs) // HAND_PAGE_SIZE))
+    page = max(0, min(page, pages - 1))
     hand_cards = []
-    if not current_player.is_ai and reveal_hand:
-        for card in current_player.hand:
-            hand_cards.append(_format_card_for_template(card))
-    
-    try:
-        discard_top = _format_card_for_template(game.get_curr_card())
-    except:
-        discard_top = None
-    
-    discard_history = []
-    if hasattr(game, "discard") and game.discard:
-        for card in game.discard[-5:]:
-            discard_history.append(_format_card_for_template(card))
-        discard_history.reverse()
-    
-    messages = _get_messages(request, clear=True)
+    for card, count in runs[page * HAND_PAGE_SIZE:(page + 1) * HAND_PAGE_SIZE]:
+        entry = _format_card_for_template(card, top)
+        entry["count"] = count
+        hand_cards.append(entry)
+    return {
+        "game": game,
+        "hand_cards": hand_cards,
+        "hand_page": page,
+        "hand_pages": pages,
+        "prev_page": page - 1 if page > 0 else None,
+        "next_page": page + 1 if page + 1 < pages else None,
+    }
+
+
+def _hand_context(request, game, snapshot):
+    current_player = snapshot.current
+    reveal_hand = _hand_revealed(request, current_player)
     
     context = {
         "game": game,
-        "players": players_info,
-        "current_player": {
-            "id": current_player.id,
-            "username": current_player.username,
-            "is_ai": current_player.is_ai,
-            "card_count": len(current_player.hand),
-            "called_uno": current_player.called
-        },
+        "current_player": _current_player_info(current_player),
         "hand_revealed": reveal_hand,
-        "hand_cards": hand_cards,
-        "discard_top": discard_top,
-        "discard_history": discard_history,
-        "messages": messages,
-        "wild_color_pending": wild_pending,
-        "game_over": not game.queue,
+        "hand_count": len(current_player.hand),
+        "wild_color_pending": request.session.get(WILD_COLOR_PENDING),
+        "seated": getattr(request, "uno_seat", None) is not None,
+    }
+    if not current_player.is_ai and reveal_hand:
+        context.update(_hand_page(game, _hand_runs(current_player.hand), snapshot.top_card, 0))
+    return context
+
+
+def _log_context(request, game, snapshot):
+    return {"messages": _get_messages(request)}
+
+
+# Parts of the game page that can be rendered and swapped in on their own:
+# name -> (template, context builder).
+FRAGMENTS = {
+    "heading": ("gameplay/fragments/heading.html", _heading_context),
+    "log": ("gameplay/fragments/log.html", _log_context),
+    "discard": ("gameplay/fragments/discard.html", _discard_context),
+    "players": ("gameplay/fragments/players.html", _players_context),
+    "hand": ("gameplay/fragments/hand.html", _hand_context),
+}
+
+
+def _fragment_keys(request, snapshot):
+    """Key of each fragment's content; a fragment only needs rendering again
+    when its key changes."""
+    current = snapshot.current
+    revealed = _hand_revealed(request, current)
+    hand = tuple((card.get_code(), count) for card, count in _hand_runs(current.hand)) if revealed and not current.is_ai else ()
+    top = deltas.card_key(snapshot.top_card)
+    return {
+        "heading": _digest(current.id, current.username, current.is_ai),
+        "log": str(request.session.get(LOG_SEQ_KEY, 0)),
+        "discard": _digest([deltas.card_key(card) for card in snapshot.recent_discard], snapshot.deck_count),
+        "players": _digest([(p.id, p.card_count, p.called) for p in snapshot.players],
+                           [p.id for p in snapshot.finished]),
+        "hand": _digest(current.id, current.is_ai, current.called, current.card_count, revealed,
+                        getattr(request, "uno_seat", None),
+                        request.session.get(WILD_COLOR_PENDING), hand, top if hand else None),
+    }
+
+
+@timing.timed("context")
+def _game_context(request, game: UnoGame):
+    """Template context for the table as the current player sees it."""
+    snapshot = game.snapshot()
+    context = {
+        "game": game,
+        "version": game.version,
+        "game_over": snapshot.game_over,
         "direction": "normal",
-        "deck_count": len(game.deck) if hasattr(game, "deck") else 0
+        "fragment_keys": _fragment_keys(request, snapshot),
     }
-    
-    return render(request, "gameplay/game.html", context) 
\ No newline at end of file
+    for template, build in FRAGMENTS.values():
+        context.update(build(request, game, snapshot))
+    return context
+
+
+LEADERBOARD_SIZE = 20
+
+
+@require_http_methods(["GET"])
+def leaderboard_view(request):
+    """Best rated players across all finished games, and the ranks of the players asked for by name."""
+    board = _get_leaderboard()
+    names = [name.strip() for name in request.GET.getlist("name") if name.strip()]
+    top, found = [], []
+    if board is not None:
+        top = board.top(LEADERBOARD_SIZE)
+        found = board.ranked(names)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "top": [dict(record.as_dict(), rank=rank) for rank, record in top],
+            "players": [dict(record.as_dict(), rank=rank) for rank, record in found],
+        })
+    return render(request, "gameplay/leaderboard.html", {
+        "enabled": board is not None,
+        "top": top,
+        "found": found,
+        "names": names,
+        "missing": [name for name in names if all(record.name != name for _, record in found)],
+    })
+
+
+@require_http_methods(["GET"])
+def spectate_view(request, game_id):
+    """Read-only view of a game, rendered once per version and shared by all spectators."""
+    state = cache.get(PUBLIC_STATE_CACHE_KEY.format(game_id=game_id))
+    if state is None:
+        raise Http404("No such game")
+
+    fmt = "json" if request.GET.get("format") == "json" else "html"
+    etag = f'"{game_id}-{state["version"]}-{fmt}"'
+    if request.headers.get("If-None-Match") == etag:
+        return HttpResponseNotModified()
+
+    render_key = SPECTATE_CACHE_KEY.format(game_id=game_id, version=state["version"], fmt=fmt)
+    body = cache.get(render_key)
+    if body is None:
+        if fmt == "json":
+            body = json.dumps(state)
+        else:
+            body = render_to_string("gameplay/spectate.html", state)
+        cache.set(render_key, body, SPECTATE_TIMEOUT)
+
+    response = HttpResponse(body, content_type="application/json" if fmt == "json" else "text/html")
+    response["ETag"] = etag
+    return response
+
+
+def _int_param(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@require_http_methods(["GET"])
+@_in_game_session
+def state_view(request):
+    """JSON changes since the client's last acknowledged version, for clients
+    other than the game page (which polls fragments_view).
+
+    Query parameters: `since` (acknowledged game version), `viewer` (the
+    player whose hand the client shows) and `log` (last message number seen).
+    Unknown or too old versions get the full state instead of a delta.
+
+    Only versions served here can be acknowledged, so the history of states
+    to diff against is built from them rather than on every save: games
+    nobody polls here never pay for it.
+    """
+    game = _load_game_from_session(request)
+    if not game:
+        return JsonResponse({"error": "No game in progress"}, status=404)
+
+    snapshot = game.snapshot()
+    current = snapshot.current
+    viewer = current.id if current and not current.is_ai and _hand_revealed(request, current) else None
+
+    history_key = STATE_HISTORY_CACHE_KEY.format(game_id=game.id)
+    history = cache.get(history_key) or []
+    state = deltas.find(history, game.version)
+    if state is None:
+        state = deltas.game_state(game)
+        cache.set(history_key, deltas.remember(history, state), SPECTATE_TIMEOUT)
+    update = deltas.update_for(history, state, _int_param(request.GET.get("since")),
+                               viewer, _int_param(request.GET.get("viewer")))
+    if update.get("full"):
+        update["card_types"] = CARD_TYPES
+    if "top" in update:
+        update["top_card"] = _format_card_for_template(snapshot.top_card)
+
+    log = request.session.get(SPECTATOR_LOG_KEY, [])
+    seq = request.session.get(LOG_SEQ_KEY, 0)
+    log_seen = _int_param(request.GET.get("log"))
+    if log_seen is None or seq - log_seen > len(log):
+        update["messages"] = log
+        update["log_reset"] = True
+    else:
+        update["messages"] = log[len(log) - (seq - log_seen):] if seq > log_seen else []
+    update["log_seq"] = seq
+    update["game_over"] = snapshot.game_over
+    return JsonResponse(update)
+
+
+@require_http_methods(["GET"])
+@_in_game_session
+def fragments_view(request):
+    """The parts of the game page whose content changed since the client's copy.
+
+    The client passes the key it holds for each fragment as a query parameter
+    (`?hand=...&log=...`); only fragments with a different key are returned.
+    Each fragment is rendered once per key and cached, so polling clients pay
+    only for what changed.
+    """
+    game = _load_game_from_session(request)
+    if not game:
+        return JsonResponse({"error": "No game in progress"}, status=404)
+
+    snapshot = game.snapshot()
+    if snapshot.game_over:
+        return JsonResponse({"version": game.version, "game_over": True})
+
+    changed = {}
+    for name, key in _fragment_keys(request, snapshot).items():
+        if request.GET.get(name) == key:
+            continue
+        cache_key = FRAGMENT_CACHE_KEY.format(game_id=game.id, seat=request.uno_seat, name=name, key=key)
+        html = cache.get(cache_key)
+        if html is None:
+            template, build = FRAGMENTS[name]
+            context = build(request, game, snapshot)
+            context.update(csrf_token=CSRF_PLACEHOLDER, version=VERSION_PLACEHOLDER)
+            with timing.phase("render"):
+                html = render_to_string(template, context)
+            cache.set(cache_key, html, SPECTATE_TIMEOUT)
+        html = html.replace(CSRF_PLACEHOLDER, get_token(request)).replace(VERSION_PLACEHOLDER, str(game.version))
+        changed[name] = {"key": key, "html": html}
+    return JsonResponse({"version": game.version, "game_over": False, "fragments": changed})
+
+
+@require_http_methods(["GET"])
+@_in_game_session
+def hand_view(request):
+    """One page (`?page=N`) of the current player's hand, grouped into runs of identical cards.
+
+    Lets the page step through very large hands while only ever rendering
+    HAND_PAGE_SIZE runs.
+    """
+    game = _load_game_from_session(request)
+    if not game or not game.queue:
+        return JsonResponse({"error": "No game in progress"}, status=404)
+
+    snapshot = game.snapshot()
+    current = snapshot.current
+    if current.is_ai or not _hand_revealed(request, current):
+        return JsonResponse({"error": "Hand not revealed"}, status=403)
+
+    context = _hand_page(game, _hand_runs(current.hand), snapshot.top_card, _int_param(request.GET.get("page")) or 0)
+    context["version"] = game.version
+    with timing.phase("render"):
+        html = render_to_string("gameplay/fragments/hand_cards.html", context, request=request)
+    return JsonResponse({"version": game.version, "page": context["hand_page"],
+                         "pages": context["hand_pages"], "html": html})
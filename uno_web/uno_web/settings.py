@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gameplay.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,10 +78,87 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLite ignores select_for_update; taking the write lock when a
+        # transaction starts keeps game saves from racing (see views._commit_game_session).
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Spectator snapshots are shared through the cache, so deployments with more
+# than one worker process need a shared backend such as Redis or Memcached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'uno',
+    }
+}
+
+
+# Seconds a human player has to act before their move is made for them
+# (0 disables turn timeouts).
+
+UNO_TURN_TIMEOUT = 300
+
+# Directory of the columnar store finished games are appended to (None disables it).
+
+UNO_ANALYTICS_DIR = BASE_DIR / 'analytics'
+
+# File finished games are appended to in the compact replay format (None disables it).
+
+UNO_REPLAY_ARCHIVE = BASE_DIR / 'replays' / 'games.unor'
+
+# File games evicted unfinished by the idle reaper are appended to, in the
+# same format, kept apart from the finished ones (None disables it).
+
+UNO_ABANDONED_ARCHIVE = BASE_DIR / 'replays' / 'abandoned.unor'
+
+# File finished games' results are appended to for the cross-game leaderboard
+# (None disables it).
+
+UNO_LEADERBOARD_FILE = BASE_DIR / 'leaderboard' / 'results.jsonl'
+
+# Share of requests (0 to 1) whose Server-Timing breakdown is also logged as
+# JSON to the "gameplay.timing" logger.
+
+UNO_TIMING_SAMPLE_RATE = 0.01
+
+# The sampled timing lines are logged at INFO, below the level Django's
+# default logging shows, so they get a handler of their own: one JSON object
+# per line on stderr.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '{message}', 'style': '{'},
+    },
+    'handlers': {
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'gameplay.timing': {'handlers': ['timing'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# JSON lines file the engine's trace spans and events (plays, deals,
+# reshuffles, AI decisions) are written to (None disables tracing), and the
+# share of traces (0 to 1) that are kept.
+
+UNO_TRACE_FILE = None
+UNO_TRACE_SAMPLE_RATE = 0.01
+
+# Seconds without a request after which a game is archived and its session
+# deleted (0 disables the reaper), and how many idle games one sweep of the
+# reaper evicts at most.
+
+UNO_GAME_IDLE_TIMEOUT = 6 * 60 * 60
+UNO_REAPER_BATCH = 50
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
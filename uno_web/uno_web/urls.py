@@ -19,5 +19,11 @@ from django.urls import path
 from gameplay import views
 urlpatterns = [
     path("", views.start_game_view, name="uno_start"),
-    path("game/", views.game_view, name="uno_game"),
+    path("lobby/", views.lobby_view, name="uno_lobby"),
+    path("leaderboard/", views.leaderboard_view, name="uno_leaderboard"),
+    path("game/<str:game_id>/", views.game_view, name="uno_game"),
+    path("game/<str:game_id>/state/", views.state_view, name="uno_state"),
+    path("game/<str:game_id>/fragments/", views.fragments_view, name="uno_fragments"),
+    path("game/<str:game_id>/hand/", views.hand_view, name="uno_hand"),
+    path("watch/<str:game_id>/", views.spectate_view, name="uno_spectate"),
 ]